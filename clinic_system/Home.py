@@ -1,6 +1,7 @@
 # Home.py
 import streamlit as st
 from shared.models import DoctorList, PatientList
+from shared.styles import inject_styles
 from datetime import datetime
 
 # Page configuration
@@ -11,40 +12,7 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS
-st.markdown("""
-    <style>
-    .big-title {
-        font-size: 3rem !important;
-        color: #1f77b4;
-        text-align: center;
-        padding: 2rem 0;
-    }
-    .card {
-        border-radius: 10px;
-        padding: 1.5rem;
-        background-color: #f8f9fa;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        margin-bottom: 1rem;
-    }
-    .stat-number {
-        font-size: 2rem;
-        font-weight: bold;
-        color: #1f77b4;
-    }
-    .welcome-text {
-        font-size: 1.2rem;
-        color: #666;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    .feature-section {
-        margin-top: 2rem;
-        padding: 1rem;
-        border-radius: 5px;
-    }
-    </style>
-""", unsafe_allow_html=True)
+inject_styles()
 
 def main():
     # Initialize session state
@@ -83,7 +51,7 @@ def main():
                 <div class="stat-number">{}</div>
                 <p>Registered Patients</p>
             </div>
-        """.format(len(st.session_state.patient_list.get_all_patients())), unsafe_allow_html=True)
+        """.format(st.session_state.patient_list.patient_count()), unsafe_allow_html=True)
 
     with col3:
         st.markdown("""
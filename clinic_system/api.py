@@ -0,0 +1,510 @@
+# api.py
+"""Headless HTTP/JSON API over the clinic data store.
+
+Run from the clinic_system directory so the JSON data files are found:
+
+    python api.py --host 127.0.0.1 --port 8080
+
+Endpoints (all bodies are JSON):
+
+    GET    /health
+    GET    /patients?limit=&cursor=          paginated listing
+    GET    /patients/search?q=&limit=&cursor=
+    POST   /patients                         create one patient
+    POST   /patients/bulk                    create many patients, saved once
+    GET    /patients/{id}
+    PUT    /patients/{id}                    partial update (If-Match supported)
+    DELETE /patients/{id}
+    POST   /patients/{id}/records            append a medical record
+    ...and the same collection/item routes under /doctors
+    POST   /batch                            {"requests": [{"method", "path", "body"}]}
+    GET    /analytics/visits?start=&end=     visits per day from the rollup tables
+    GET    /analytics/diagnoses?doctor=&limit=
+    GET    /analytics/prescriptions?doctor=&limit=
+    GET    /analytics/doctors
+    GET    /export                           every doctor and patient from one snapshot
+
+GET responses carry an ETag; send it back in If-None-Match to get a 304.
+Writes are recorded in the audit log under the X-Actor header, if sent.
+Bodies are validated and normalized by shared.validation; a failure is a
+400 whose "fields" object maps each bad field to what is wrong with it.
+"""
+import argparse
+import asyncio
+import base64
+import functools
+import hashlib
+import heapq
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from shared.models import DoctorList, PatientList
+from shared.snapshot import Snapshot
+from shared.validation import (unknown_fields, validate_batch, validate_doctor,
+                               validate_medical_record, validate_patient)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MAX_BATCH_SIZE = 100
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+REASONS = {
+    200: 'OK',
+    201: 'Created',
+    204: 'No Content',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    409: 'Conflict',
+    412: 'Precondition Failed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+
+class APIError(Exception):
+    def __init__(self, status: int, message: str, fields: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.fields = fields
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the serialized response body"""
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def encode_cursor(last_id: str) -> str:
+    raw = json.dumps({'id': last_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return str(data['id'])
+    except (ValueError, KeyError, TypeError):
+        raise APIError(400, 'Invalid cursor')
+
+
+def int_param(query: Dict[str, str], name: str, default: int) -> int:
+    try:
+        return int(query.get(name, default))
+    except ValueError:
+        raise APIError(400, f'{name} must be an integer')
+
+
+def paginate(items: Union[List, Snapshot], query: Dict[str, str]) -> Dict:
+    """Keyset pagination in ID order over a list or a snapshot.
+
+    The cursor holds the ID of the last item returned and the next page
+    starts after it. Records that move around between requests, or are
+    added or removed before the cursor, cannot make a page skip or repeat
+    anyone. A snapshot only decodes the records on the page.
+    """
+    limit = max(1, min(int_param(query, 'limit', DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    after = decode_cursor(query['cursor']) if query.get('cursor') else None
+
+    if isinstance(items, Snapshot):
+        page = items.page(after, limit + 1)
+    else:
+        candidates = items if after is None else (item for item in items if item.id > after)
+        page = heapq.nsmallest(limit + 1, candidates, key=lambda item: item.id)
+    has_more = len(page) > limit
+    page = page[:limit]
+    return {
+        'items': [item.to_dict() for item in page],
+        'next_cursor': encode_cursor(page[-1].id) if has_more else None,
+        'total': len(items),
+    }
+
+
+def actor(headers: Dict[str, str]) -> str:
+    """Who to record in the audit log for a write"""
+    return 'api:' + headers['x-actor'] if headers.get('x-actor') else 'api'
+
+
+def validated(validator, body, partial: bool = False) -> Dict:
+    """Normalized body, or a 400 listing every field that failed or is unknown"""
+    if not isinstance(body, dict):
+        raise APIError(400, 'Request body must be a JSON object')
+    value, errors = validator(body, partial=partial)
+    errors.update(unknown_fields(body, value))
+    if errors:
+        raise APIError(400, 'Validation failed', errors)
+    return value
+
+
+def bulk_create(body, kind: str, label: str, exists, add_all, headers) -> Dict:
+    """Validate a whole array in one pass and add the valid, new rows with one save"""
+    if not isinstance(body, list):
+        raise APIError(400, 'Request body must be a JSON array')
+    report = validate_batch(body, kind)
+    results: List[Optional[Dict]] = [None] * len(body)
+    for row, errors in report.errors.items():
+        results[row] = {'status': 400, 'error': 'Validation failed', 'fields': errors}
+
+    accepted = []
+    for row, data in zip(report.valid_rows, report.valid):
+        if exists(data['id']):
+            results[row] = {'status': 409, 'error': f"{label} {data['id']} already exists"}
+        else:
+            accepted.append(data)
+            results[row] = {'status': 201, 'id': data['id']}
+    if accepted:
+        add_all(accepted, actor=actor(headers))
+    return {'created': len(accepted), 'results': results,
+            'error_summary': dict(report.summary())}
+
+
+class ClinicAPI:
+    """Routes requests onto DoctorList and PatientList.
+
+    Routing is independent of the transport so the same handlers serve plain
+    HTTP requests and the sub-requests of a /batch call.
+    """
+
+    def __init__(self, doctor_list: Optional[DoctorList] = None,
+                 patient_list: Optional[PatientList] = None):
+        self.doctor_list = doctor_list if doctor_list is not None else DoctorList()
+        self.patient_list = patient_list if patient_list is not None else PatientList()
+        self.routes = [
+            ('GET', re.compile(r'^/health$'), self.health),
+            ('POST', re.compile(r'^/batch$'), self.batch),
+            ('GET', re.compile(r'^/patients$'), self.list_patients),
+            ('POST', re.compile(r'^/patients$'), self.create_patient),
+            ('GET', re.compile(r'^/patients/search$'), self.search_patients),
+            ('POST', re.compile(r'^/patients/bulk$'), self.bulk_create_patients),
+            ('POST', re.compile(r'^/patients/([^/]+)/records$'), self.add_medical_record),
+            ('GET', re.compile(r'^/patients/([^/]+)$'), self.get_patient),
+            ('PUT', re.compile(r'^/patients/([^/]+)$'), self.update_patient),
+            ('DELETE', re.compile(r'^/patients/([^/]+)$'), self.delete_patient),
+            ('GET', re.compile(r'^/doctors$'), self.list_doctors),
+            ('POST', re.compile(r'^/doctors$'), self.create_doctor),
+            ('GET', re.compile(r'^/doctors/search$'), self.search_doctors),
+            ('POST', re.compile(r'^/doctors/bulk$'), self.bulk_create_doctors),
+            ('GET', re.compile(r'^/doctors/([^/]+)$'), self.get_doctor),
+            ('PUT', re.compile(r'^/doctors/([^/]+)$'), self.update_doctor),
+            ('DELETE', re.compile(r'^/doctors/([^/]+)$'), self.delete_doctor),
+            ('GET', re.compile(r'^/analytics/visits$'), self.visits_per_day),
+            ('GET', re.compile(r'^/analytics/diagnoses$'), self.top_diagnoses),
+            ('GET', re.compile(r'^/analytics/prescriptions$'), self.top_prescriptions),
+            ('GET', re.compile(r'^/analytics/doctors$'), self.visits_by_doctor),
+            ('GET', re.compile(r'^/export$'), self.export),
+        ]
+        # Long reads that only touch snapshots; the server runs them on a worker thread
+        self.background = {self.export, self.search_patients}
+
+    def dispatch(self, method: str, target: str, headers: Dict[str, str],
+                 body) -> Tuple[int, Optional[bytes], Dict[str, str]]:
+        """Handle one request and return (status, body bytes, extra headers)"""
+        parts = urlsplit(target)
+        path = parts.path.rstrip('/') or '/'
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+
+        try:
+            status, payload = self.route(method, path, query, headers, body)
+        except APIError as e:
+            status, payload = e.status, {'error': e.message}
+            if e.fields:
+                payload['fields'] = e.fields
+        except Exception as e:
+            status, payload = 500, {'error': str(e)}
+
+        if payload is None:
+            return status, None, {}
+        data = json.dumps(payload, separators=(',', ':')).encode()
+        if method != 'GET' or status != 200:
+            return status, data, {}
+
+        etag = make_etag(data)
+        if_none_match = headers.get('if-none-match', '')
+        if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match == '*':
+            return 304, None, {'ETag': etag}
+        return status, data, {'ETag': etag, 'Cache-Control': 'no-cache'}
+
+    def route(self, method, path, query, headers, body):
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if not match:
+                continue
+            allowed = True
+            if route_method == method:
+                args = [unquote(group) for group in match.groups()]
+                return handler(*args, query=query, headers=headers, body=body)
+        if allowed:
+            raise APIError(405, f'{method} not allowed on {path}')
+        raise APIError(404, f'No route for {path}')
+
+    def runs_in_background(self, method: str, target: str) -> bool:
+        path = urlsplit(target).path.rstrip('/') or '/'
+        return any(route_method == method and handler in self.background and pattern.match(path)
+                   for route_method, pattern, handler in self.routes)
+
+    def check_if_match(self, record, headers):
+        """Reject a write if the client's ETag no longer matches the record"""
+        expected = headers.get('if-match')
+        if not expected or expected == '*':
+            return
+        current = make_etag(json.dumps(record.to_dict(), separators=(',', ':')).encode())
+        if current not in [tag.strip() for tag in expected.split(',')]:
+            raise APIError(412, 'Record has been modified')
+
+    def health(self, query, headers, body):
+        return 200, {'status': 'ok'}
+
+    def batch(self, query, headers, body):
+        """Run several sub-requests in one round trip, in order"""
+        if not isinstance(body, dict) or not isinstance(body.get('requests'), list):
+            raise APIError(400, 'Body must be {"requests": [...]}')
+        requests = body['requests']
+        if len(requests) > MAX_BATCH_SIZE:
+            raise APIError(413, f'At most {MAX_BATCH_SIZE} requests per batch')
+
+        responses = []
+        for request in requests:
+            if not isinstance(request, dict) or 'path' not in request:
+                responses.append({'status': 400, 'body': {'error': 'Invalid sub-request'}})
+                continue
+            method = str(request.get('method', 'GET')).upper()
+            if urlsplit(request['path']).path.rstrip('/') == '/batch':
+                responses.append({'status': 400, 'body': {'error': 'Nested batches are not allowed'}})
+                continue
+            sub_headers = {k.lower(): v for k, v in (request.get('headers') or {}).items()}
+            status, data, extra = self.dispatch(method, request['path'], sub_headers,
+                                                request.get('body'))
+            response = {'status': status, 'body': json.loads(data) if data else None}
+            if 'ETag' in extra:
+                response['etag'] = extra['ETag']
+            responses.append(response)
+        return 200, {'responses': responses}
+
+    # Patients
+
+    def list_patients(self, query, headers, body):
+        return 200, paginate(self.patient_list.snapshot(), query)
+
+    def search_patients(self, query, headers, body):
+        term = query.get('q', '')
+        if not term:
+            raise APIError(400, 'Query parameter q is required')
+        return 200, paginate(self.patient_list.search_snapshot(term), query)
+
+    def get_patient(self, patient_id, query, headers, body):
+        patient = self.patient_list.find_patient(patient_id)
+        if not patient:
+            raise APIError(404, f'Patient {patient_id} not found')
+        return 200, patient.to_dict()
+
+    def create_patient(self, query, headers, body):
+        data = validated(validate_patient, body)
+        if not self.patient_list.add_patient(data, actor=actor(headers)):
+            raise APIError(409, f"Patient {data['id']} already exists")
+        return 201, self.patient_list.find_patient(data['id']).to_dict()
+
+    def bulk_create_patients(self, query, headers, body):
+        return 200, bulk_create(body, 'patient', 'Patient', self.patient_list.has_patient,
+                                self.patient_list.add_patients, headers)
+
+    def update_patient(self, patient_id, query, headers, body):
+        body = validated(validate_patient, body, partial=True)
+        patient = self.patient_list.find_patient(patient_id)
+        if not patient:
+            raise APIError(404, f'Patient {patient_id} not found')
+        self.check_if_match(patient, headers)
+        updates = {key: value for key, value in body.items() if key not in ('id', 'next')}
+        self.patient_list.update_patient(patient_id, updates, actor=actor(headers))
+        return 200, patient.to_dict()
+
+    def delete_patient(self, patient_id, query, headers, body):
+        if not self.patient_list.remove_patient(patient_id, actor=actor(headers)):
+            raise APIError(404, f'Patient {patient_id} not found')
+        return 204, None
+
+    def add_medical_record(self, patient_id, query, headers, body):
+        if not isinstance(body, dict):
+            raise APIError(400, 'Request body must be a JSON object')
+        record, errors = validate_medical_record(body)
+        if errors:
+            raise APIError(400, 'Validation failed', errors)
+        if not self.patient_list.add_medical_record(patient_id, record, actor=actor(headers)):
+            raise APIError(404, f'Patient {patient_id} not found')
+        return 201, record
+
+    # Doctors
+
+    def list_doctors(self, query, headers, body):
+        return 200, paginate(self.doctor_list.snapshot(), query)
+
+    def search_doctors(self, query, headers, body):
+        term = query.get('q', '').lower()
+        if not term:
+            raise APIError(400, 'Query parameter q is required')
+        results = [d for d in self.doctor_list.snapshot()
+                   if term in d.name.lower() or term in d.id.lower()
+                   or term in d.specialization.lower() or term in d.contact.lower()]
+        return 200, paginate(results, query)
+
+    def get_doctor(self, doctor_id, query, headers, body):
+        doctor = self.doctor_list.find_doctor(doctor_id)
+        if not doctor:
+            raise APIError(404, f'Doctor {doctor_id} not found')
+        return 200, doctor.to_dict()
+
+    def create_doctor(self, query, headers, body):
+        data = validated(validate_doctor, body)
+        if not self.doctor_list.add_doctor(data, actor=actor(headers)):
+            raise APIError(409, f"Doctor {data['id']} already exists")
+        return 201, self.doctor_list.find_doctor(data['id']).to_dict()
+
+    def bulk_create_doctors(self, query, headers, body):
+        return 200, bulk_create(body, 'doctor', 'Doctor', self.doctor_list.has_doctor,
+                                self.doctor_list.add_doctors, headers)
+
+    def update_doctor(self, doctor_id, query, headers, body):
+        body = validated(validate_doctor, body, partial=True)
+        doctor = self.doctor_list.find_doctor(doctor_id)
+        if not doctor:
+            raise APIError(404, f'Doctor {doctor_id} not found')
+        self.check_if_match(doctor, headers)
+        updates = {key: value for key, value in body.items() if key not in ('id', 'next')}
+        self.doctor_list.update_doctor(doctor_id, updates, actor=actor(headers))
+        return 200, doctor.to_dict()
+
+    def delete_doctor(self, doctor_id, query, headers, body):
+        if not self.doctor_list.remove_doctor(doctor_id, actor=actor(headers)):
+            raise APIError(404, f'Doctor {doctor_id} not found')
+        return 204, None
+
+    # Analytics
+
+    def visits_per_day(self, query, headers, body):
+        rows = self.patient_list.rollups.visits_per_day(query.get('start'), query.get('end'))
+        return 200, {'items': [{'date': day, 'visits': count} for day, count in rows]}
+
+    def top_diagnoses(self, query, headers, body):
+        rows = self.patient_list.rollups.top_diagnoses(int_param(query, 'limit', 10), query.get('doctor'))
+        return 200, {'items': [{'diagnosis': name, 'visits': count} for name, count in rows]}
+
+    def top_prescriptions(self, query, headers, body):
+        rows = self.patient_list.rollups.top_prescriptions(int_param(query, 'limit', 10), query.get('doctor'))
+        return 200, {'items': [{'prescription': name, 'visits': count} for name, count in rows]}
+
+    def visits_by_doctor(self, query, headers, body):
+        rows = self.patient_list.rollups.visits_by_doctor()
+        return 200, {'items': [{'doctor': name, 'visits': count} for name, count in rows]}
+
+    # Export
+
+    def export(self, query, headers, body):
+        doctors, patients = self.doctor_list.snapshot(), self.patient_list.snapshot()
+        return 200, {
+            'taken_at': patients.taken_at,
+            'doctors': [doctor.to_dict() for doctor in doctors],
+            'patients': [patient.to_dict() for patient in patients],
+        }
+
+
+class HTTPServer:
+    """Minimal HTTP/1.1 server on asyncio streams with keep-alive and pipelining"""
+
+    def __init__(self, api: ClinicAPI):
+        self.api = api
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self.respond(writer, 400, json.dumps({'error': 'Bad request line'}).encode(), {}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = (version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close') or \
+                    headers.get('connection', '').lower() == 'keep-alive'
+
+                content_length = headers.get('content-length') or '0'
+                if not (content_length.isdigit() and content_length.isascii()):
+                    await self.respond(writer, 400, json.dumps({'error': 'Invalid Content-Length'}).encode(),
+                                       {}, False)
+                    break
+                length = int(content_length)
+                if length > MAX_BODY_SIZE:
+                    await self.respond(writer, 413, json.dumps({'error': 'Body too large'}).encode(), {}, False)
+                    break
+                raw = await reader.readexactly(length) if length else b''
+                try:
+                    body = json.loads(raw) if raw else None
+                except ValueError:
+                    status, data, extra = 400, json.dumps({'error': 'Invalid JSON body'}).encode(), {}
+                else:
+                    dispatch = functools.partial(self.api.dispatch, method.upper(), target, headers, body)
+                    if self.api.runs_in_background(method.upper(), target):
+                        status, data, extra = await asyncio.to_thread(dispatch)
+                    else:
+                        status, data, extra = dispatch()
+
+                await self.respond(writer, status, data if method.upper() != 'HEAD' else None,
+                                   extra, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, data, extra, keep_alive):
+        lines = [f'HTTP/1.1 {status} {REASONS.get(status, "")}']
+        if data is not None:
+            lines.append('Content-Type: application/json')
+        lines.append(f'Content-Length: {len(data) if data else 0}')
+        lines.append('Connection: ' + ('keep-alive' if keep_alive else 'close'))
+        lines.extend(f'{name}: {value}' for name, value in extra.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + (data or b''))
+        await writer.drain()
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        addresses = ', '.join(str(sock.getsockname()) for sock in server.sockets)
+        print(f'Clinic API listening on {addresses}')
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Clinic System HTTP/JSON API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--data-dir', default=os.path.dirname(os.path.abspath(__file__)),
+                        help='Directory holding doctors.json and patients.json')
+    args = parser.parse_args()
+
+    os.chdir(args.data_dir)
+    server = HTTPServer(ClinicAPI())
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+# loadtest.py
+"""Load generator for the clinic HTTP API.
+
+Start the API first (python api.py), then for example:
+
+    python loadtest.py --connections 32 --duration 10
+    python loadtest.py --path /patients?limit=100 --path /doctors
+
+Each connection keeps its socket open and sends requests back to back. The
+report gives requests/sec and latency percentiles per run. Only GET requests
+are issued so the data files are never modified.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from typing import List
+from urllib.request import urlopen
+
+
+async def worker(host: str, port: int, paths, deadline: float, latencies: List[float],
+                 statuses: dict):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            path = next(paths)
+            request = f'GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode()
+            started = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            if not status_line:
+                break
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            if length:
+                await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+
+            status = int(status_line.split()[1])
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def default_paths(base_url: str) -> List[str]:
+    """Listing, item and search paths built from the data the server holds"""
+    paths = ['/health', '/patients', '/doctors']
+    for collection in ('patients', 'doctors'):
+        with urlopen(f'{base_url}/{collection}?limit=20') as response:
+            items = json.load(response)['items']
+        paths.extend(f'/{collection}/{item["id"]}' for item in items)
+        if items:
+            paths.append(f'/{collection}/search?q={items[0]["name"][:2]}')
+    return paths
+
+
+async def run(host: str, port: int, paths: List[str], connections: int, duration: float):
+    latencies: List[float] = []
+    statuses: dict = {}
+    cycle = itertools.cycle(paths)
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(worker(host, port, cycle, deadline, latencies, statuses)
+                           for _ in range(connections)))
+    elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the clinic HTTP API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--connections', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run')
+    parser.add_argument('--path', action='append', dest='paths',
+                        help='Path to request; repeat for a mix (default: derived from the data)')
+    args = parser.parse_args()
+
+    paths = args.paths or default_paths(f'http://{args.host}:{args.port}')
+    latencies, statuses, elapsed = asyncio.run(
+        run(args.host, args.port, paths, args.connections, args.duration))
+
+    latencies.sort()
+    print(f'Requests:     {len(latencies)} over {elapsed:.2f}s '
+          f'with {args.connections} connections')
+    print(f'Throughput:   {len(latencies) / elapsed:,.0f} requests/sec')
+    print('Status codes: ' + ', '.join(f'{code}={count}' for code, count in sorted(statuses.items())))
+    print('Latency (ms): ' + '  '.join(
+        f'p{pct}={percentile(latencies, pct) * 1000:.2f}' for pct in (50, 90, 99, 99.9)) +
+        f'  max={(latencies[-1] if latencies else 0) * 1000:.2f}')
+
+
+if __name__ == '__main__':
+    main()
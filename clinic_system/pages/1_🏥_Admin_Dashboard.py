@@ -1,46 +1,22 @@
 import streamlit as st
-from shared.models import DoctorList
-import pandas as pd
+from shared.analytics import get_rollups
+from shared.models import DoctorList, PatientList
+from shared.schedule import DEFAULT_HOURS
+from shared.components import doctor_card_markup, render_cache_stats
+from shared.styles import inject_styles
+from shared.validation import format_errors, validate_doctor
 from datetime import datetime, time
 import uuid
 
 # Page configuration
 st.set_page_config(page_title="Doctor Management", layout="wide")
 
-# Custom CSS
-st.markdown("""
-    <style>
-    .doctor-form {
-        background-color: #f8f9fa;
-        padding: 20px;
-        border-radius: 10px;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-    }
-    .success-message {
-        color: #28a745;
-        padding: 10px;
-        border-radius: 5px;
-        margin: 10px 0;
-    }
-    .error-message {
-        color: #dc3545;
-        padding: 10px;
-        border-radius: 5px;
-        margin: 10px 0;
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-def validate_phone(phone):
-    """Validate phone number format"""
-    import re
-    pattern = r'^\+?[\d\s-]{10,}$'
-    return bool(re.match(pattern, phone))
+inject_styles()
 
 def delete_doctor(doctor_id):
     """Handle doctor deletion with state management"""
     if 'doctor_list' in st.session_state:
-        st.session_state.doctor_list.remove_doctor(doctor_id)
+        st.session_state.doctor_list.remove_doctor(doctor_id, actor='admin-dashboard')
         st.success(f"Doctor with ID {doctor_id} has been deleted")
         st.rerun()
 
@@ -50,13 +26,12 @@ def main():
     # Initialize doctor list in session state if not exists
     if 'doctor_list' not in st.session_state:
         st.session_state.doctor_list = DoctorList()
-
     # Initialize delete confirmation state if not exists
     if 'delete_confirmation' not in st.session_state:
         st.session_state.delete_confirmation = {}
 
     # Tabs for different functionalities
-    tab1, tab2, tab3 = st.tabs(["Add Doctor", "View Doctors", "Update Doctor"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Add Doctor", "View Doctors", "Update Doctor", "Analytics"])
 
     # Add Doctor Tab
     with tab1:
@@ -103,37 +78,31 @@ def main():
             
             if submitted:
                 # Validation
-                validation_errors = []
-                if not doctor_id or not name or not specialization or not phone:
-                    validation_errors.append("Please fill in all required fields marked with *")
-                if not validate_phone(phone):
-                    validation_errors.append("Please enter a valid phone number")
-                if not working_days:
-                    validation_errors.append("Please select at least one working day")
+                new_doctor, errors = validate_doctor({
+                    'id': doctor_id,
+                    'name': name,
+                    'specialization': specialization,
+                    'contact': phone,
+                    'experience': experience,
+                    'qualification': qualification,
+                    'schedule': working_days,
+                    'working_hours': {
+                        'start': start_time.strftime("%H:%M"),
+                        'end': end_time.strftime("%H:%M")
+                    },
+                    'emergency_contact': emergency_contact,
+                    'notes': notes
+                })
+                validation_errors = format_errors(errors)
+                if 'id' not in errors and st.session_state.doctor_list.has_doctor(new_doctor['id']):
+                    validation_errors.append(f"A doctor with ID {new_doctor['id']} already exists")
                 
                 if validation_errors:
                     for error in validation_errors:
                         st.error(error)
                 else:
-                    # Create new doctor
-                    new_doctor = {
-                        'id': doctor_id,
-                        'name': name,
-                        'specialization': specialization,
-                        'contact': phone,
-                        'experience': experience,
-                        'qualification': qualification,
-                        'schedule': working_days,
-                        'working_hours': {
-                            'start': start_time.strftime("%H:%M"),
-                            'end': end_time.strftime("%H:%M")
-                        },
-                        'emergency_contact': emergency_contact,
-                        'notes': notes
-                    }
-                    
                     # Add to list
-                    st.session_state.doctor_list.add_doctor(new_doctor)
+                    st.session_state.doctor_list.add_doctor(new_doctor, actor='admin-dashboard')
                     st.success("Doctor registered successfully!")
                     st.rerun()
 
@@ -145,21 +114,17 @@ def main():
         if doctors:
             for index, doctor in enumerate(doctors):
                 try:
-                    with st.expander(f"Dr. {doctor.name} ({doctor.specialization})"):
+                    card = doctor_card_markup(doctor)
+                    with st.expander(card['title']):
                         col1, col2 = st.columns(2)
                         with col1:
-                            st.write("*Contact Information*")
-                            st.write(f"📞 Phone: {doctor.contact}")
-                            if hasattr(doctor, 'emergency_contact'):
-                                st.write(f"🚨 Emergency Contact: {doctor.emergency_contact}")
+                            st.markdown(card['contact'])
                         
                         with col2:
-                            st.write("*Professional Details*")
-                            st.write("📅 Working Days: " + ", ".join(doctor.schedule))
+                            st.markdown(card['details'])
                         
-                        if hasattr(doctor, 'notes') and doctor.notes:
-                            st.write("*Additional Notes*")
-                            st.write(doctor.notes)
+                        if card['notes']:
+                            st.markdown(card['notes'])
                         
                         # Two-step deletion process
                         delete_key = f"delete_{doctor.id}_{index}"
@@ -188,6 +153,10 @@ def main():
         else:
             st.info("No doctors registered yet.")
 
+        stats = render_cache_stats()
+        st.caption(f"Card cache: {stats['hits']} hits, {stats['misses']} misses, "
+                   f"{stats['entries']}/{stats['max_entries']} entries")
+
     # Update Doctor Tab
     with tab3:
         st.header("Update Doctor Information")
@@ -209,19 +178,81 @@ def main():
                             ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"],
                             default=doctor.schedule
                         )
+                        hours = doctor.working_hours or DEFAULT_HOURS
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            start_time = st.time_input("Update Start Time",
+                                                       datetime.strptime(hours['start'], "%H:%M").time())
+                        with col2:
+                            end_time = st.time_input("Update End Time",
+                                                     datetime.strptime(hours['end'], "%H:%M").time())
                         notes = st.text_area("Update Notes", getattr(doctor, 'notes', ''))
                         
                         if st.form_submit_button("Update Information"):
                             updates = {
                                 'contact': phone,
                                 'schedule': working_days,
+                                'working_hours': {
+                                    'start': start_time.strftime("%H:%M"),
+                                    'end': end_time.strftime("%H:%M")
+                                },
                                 'notes': notes
                             }
-                            st.session_state.doctor_list.update_doctor(doctor_id, updates)
-                            st.success("Doctor information updated successfully!")
-                            st.rerun()
+                            updates, errors = validate_doctor(updates, partial=True)
+                            if errors:
+                                for error in format_errors(errors):
+                                    st.error(error)
+                            else:
+                                st.session_state.doctor_list.update_doctor(doctor_id, updates, actor='admin-dashboard')
+                                st.success("Doctor information updated successfully!")
+                                st.rerun()
         else:
             st.info("No doctors available to update.")
 
+    # Analytics Tab
+    with tab4:
+        st.header("Clinical Analytics")
+        rollups = get_rollups()
+        if not rollups.loaded and 'patient_list' not in st.session_state:
+            # No saved tables yet: loading the patients rebuilds them
+            st.session_state.patient_list = PatientList()
+
+        if rollups.total:
+            import pandas as pd  # only needed for the charts
+            daily = rollups.visits_per_day()
+            by_doctor = rollups.visits_by_doctor()
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Total Visits", rollups.total)
+            col2.metric("Days with Visits", len(daily))
+            col3.metric("Doctors Seeing Patients", len(by_doctor))
+
+            st.subheader("Visits per Day")
+            st.line_chart(pd.DataFrame(daily, columns=['Date', 'Visits']).set_index('Date'))
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.subheader("Top Diagnoses")
+                st.bar_chart(pd.DataFrame(rollups.top_diagnoses(), columns=['Diagnosis', 'Visits'])
+                             .set_index('Diagnosis'))
+            with col2:
+                st.subheader("Visits by Doctor")
+                st.bar_chart(pd.DataFrame(by_doctor, columns=['Doctor', 'Visits']).set_index('Doctor'))
+
+            st.subheader("Per Doctor")
+            selected = st.selectbox("Doctor", [name for name, _ in by_doctor])
+            col1, col2 = st.columns(2)
+            with col1:
+                st.write("*Top Diagnoses*")
+                st.dataframe(pd.DataFrame(rollups.top_diagnoses(doctor=selected),
+                                          columns=['Diagnosis', 'Visits']),
+                             use_container_width=True, hide_index=True)
+            with col2:
+                st.write("*Top Prescriptions*")
+                st.dataframe(pd.DataFrame(rollups.top_prescriptions(doctor=selected),
+                                          columns=['Prescription', 'Visits']),
+                             use_container_width=True, hide_index=True)
+        else:
+            st.info("No medical records have been added yet.")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,35 +1,27 @@
 # pages/2_👥_Patient_Management.py
 import streamlit as st
 from shared.models import PatientList, DoctorList
+from shared.schedule import WEEKDAYS
+from shared.dedupe import find_duplicates, merge_patients
 from shared.components import render_patient_record, render_patient_table
+from shared.styles import inject_styles
+from shared.validation import format_errors, validate_patient
 import datetime
 
 st.set_page_config(page_title="Patient Management", layout="wide")
 
-# Apply custom CSS
-st.markdown("""
-    <style>
-    .patient-card {
-        background-color: #ffffff;
-        padding: 1.5rem;
-        border-radius: 10px;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        margin-bottom: 1rem;
-    }
-    .search-box {
-        background-color: #f8f9fa;
-        padding: 1.5rem;
-        border-radius: 10px;
-        margin-bottom: 2rem;
-    }
-    .medical-history {
-        background-color: #e9ecef;
-        padding: 1rem;
-        border-radius: 5px;
-        margin-top: 1rem;
-    }
-    </style>
-""", unsafe_allow_html=True)
+RECORDS_PER_PAGE = 20
+
+inject_styles()
+
+def ordered_patient_ids(snapshot, filter_doctor, filter_gender, sort_by):
+    """IDs of the matching patients in display order; only sort keys are kept"""
+    sort_keys = {"ID": lambda p: p.id, "Name": lambda p: p.name, "Age": lambda p: p.age}
+    matches = [(sort_keys[sort_by](p), p.id) for p in snapshot
+               if (filter_doctor == "All" or p.assigned_doctor.startswith(filter_doctor))
+               and (filter_gender == "All" or p.gender == filter_gender)]
+    matches.sort(key=lambda match: match[0])
+    return [patient_id for _, patient_id in matches]
 
 def main():
     st.title("👥 Patient Management")
@@ -41,10 +33,34 @@ def main():
         st.session_state.doctor_list = DoctorList()
 
     # Tabs for different patient management functions
-    tab1, tab2, tab3 = st.tabs(["📝 Register Patient", "🔍 Search Patients", "📋 Patient Records"])
+    tab1, tab2, tab3, tab4 = st.tabs(["📝 Register Patient", "🔍 Search Patients", "📋 Patient Records",
+                                      "🧬 Duplicates"])
 
     with tab1:
         st.header("Register New Patient")
+
+        # Narrow the doctor choices outside the form so they refresh immediately
+        schedule_index = st.session_state.doctor_list.schedule_index()
+        now = datetime.datetime.now()
+        col1, col2, col3, col4 = st.columns([1, 2, 1, 1])
+        with col1:
+            on_duty_only = st.checkbox("Only doctors on duty")
+        with col2:
+            duty_specialization = st.selectbox("Specialization",
+                                               ["Any"] + schedule_index.specializations(),
+                                               disabled=not on_duty_only)
+        with col3:
+            duty_day = st.selectbox("Day", WEEKDAYS, index=now.weekday(), disabled=not on_duty_only)
+        with col4:
+            duty_time = st.time_input("Time", now.time().replace(second=0, microsecond=0),
+                                      disabled=not on_duty_only)
+
+        if on_duty_only:
+            doctors = schedule_index.available(
+                duty_day, duty_time, None if duty_specialization == "Any" else duty_specialization)
+        else:
+            doctors = st.session_state.doctor_list.get_all_doctors()
+
         with st.form("add_patient_form"):
             col1, col2 = st.columns(2)
             with col1:
@@ -54,7 +70,6 @@ def main():
             with col2:
                 gender = st.selectbox("Gender", ["Male", "Female", "Other"])
                 contact = st.text_input("Contact Number")
-                doctors = st.session_state.doctor_list.get_all_doctors()
                 doctor_options = [""] + [f"{d.name} ({d.specialization})" for d in doctors]
                 assigned_doctor = st.selectbox("Assign Doctor", doctor_options)
 
@@ -62,22 +77,24 @@ def main():
             medical_notes = st.text_area("Medical Notes")
 
             if st.form_submit_button("Register Patient"):
-                if patient_id and name and contact:
-                    new_patient = {
-                        "id": patient_id,
-                        "name": name,
-                        "age": age,
-                        "gender": gender,
-                        "contact": contact,
-                        "assigned_doctor": assigned_doctor,
-                        "emergency_contact": emergency_contact,
-                        "medical_history": [],
-                        "notes": medical_notes
-                    }
-                    st.session_state.patient_list.add_patient(new_patient)
+                new_patient, errors = validate_patient({
+                    "id": patient_id,
+                    "name": name,
+                    "age": age,
+                    "gender": gender,
+                    "contact": contact,
+                    "assigned_doctor": assigned_doctor,
+                    "emergency_contact": emergency_contact,
+                    "medical_history": [],
+                    "notes": medical_notes
+                })
+                if errors:
+                    for error in format_errors(errors):
+                        st.error(error)
+                elif st.session_state.patient_list.add_patient(new_patient, actor='patient-management'):
                     st.success("Patient registered successfully!")
                 else:
-                    st.error("Please fill in all required fields.")
+                    st.error(f"A patient with ID {new_patient['id']} already exists.")
 
     with tab2:
         st.header("Search Patients")
@@ -99,8 +116,8 @@ def main():
 
     with tab3:
         st.header("All Patient Records")
-        patients = st.session_state.patient_list.get_all_patients()
-        
+        snapshot = st.session_state.patient_list.snapshot()
+
         # Filter options
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -109,27 +126,72 @@ def main():
         with col2:
             filter_gender = st.selectbox("Filter by Gender", ["All", "Male", "Female", "Other"])
         with col3:
-            sort_by = st.selectbox("Sort by", ["Name", "ID", "Age"])
-
-        if patients:
-            # Apply filters
-            if filter_doctor != "All":
-                patients = [p for p in patients if p.assigned_doctor.startswith(filter_doctor)]
-            if filter_gender != "All":
-                patients = [p for p in patients if p.gender == filter_gender]
-
-            # Sort patients
-            if sort_by == "Name":
-                patients.sort(key=lambda x: x.name)
-            elif sort_by == "ID":
-                patients.sort(key=lambda x: x.id)
-            elif sort_by == "Age":
-                patients.sort(key=lambda x: x.age)
-
-            for patient in patients:
-                render_patient_record(patient)
+            sort_by = st.selectbox("Sort by", ["ID", "Name", "Age"])
+
+        unfiltered = filter_doctor == "All" and filter_gender == "All" and sort_by == "ID"
+        if unfiltered:
+            # ID order needs no patient data, so only the page shown gets decoded
+            patient_ids = sorted(snapshot.ids())
         else:
+            # Filtering reads every patient, so do it once per choice, not on every rerun
+            order_key = (filter_doctor, filter_gender, sort_by)
+            refresh = st.button("Refresh list")
+            if refresh or st.session_state.get('record_order_key') != order_key:
+                st.session_state.record_order_key = order_key
+                st.session_state.record_order = ordered_patient_ids(
+                    snapshot, filter_doctor, filter_gender, sort_by)
+            patient_ids = st.session_state.record_order
+
+        if patient_ids:
+            pages = (len(patient_ids) - 1) // RECORDS_PER_PAGE + 1
+            page = st.number_input("Page", min_value=1, max_value=pages, value=1)
+            st.caption(f"{len(patient_ids)} patients, page {page} of {pages}")
+            start = (page - 1) * RECORDS_PER_PAGE
+            for patient_id in patient_ids[start:start + RECORDS_PER_PAGE]:
+                patient = snapshot.get(patient_id)
+                if patient:
+                    render_patient_record(patient)
+        elif unfiltered:
             st.info("No patients registered yet.")
+        else:
+            st.info("No patients match these filters.")
+
+    with tab4:
+        st.header("Possible Duplicate Patients")
+        if st.button("Scan for duplicates"):
+            # Keep the scanned snapshot for labels; only a merge touches the live list
+            st.session_state.duplicate_snapshot = st.session_state.patient_list.snapshot()
+            st.session_state.duplicate_candidates = find_duplicates(
+                st.session_state.duplicate_snapshot)
+
+        candidates = st.session_state.get('duplicate_candidates')
+        if candidates is None:
+            st.info("Scan to look for patients registered more than once.")
+        elif not candidates:
+            st.success("No likely duplicates found.")
+        else:
+            st.write(f"Found {len(candidates)} likely duplicate pairs:")
+            scanned = st.session_state.duplicate_snapshot
+            for index, candidate in enumerate(candidates):
+                first = scanned.get(candidate.first_id)
+                second = scanned.get(candidate.second_id)
+                if not first or not second:
+                    continue
+                with st.expander(f"{first.name} ({first.id}) ↔ {second.name} ({second.id}) "
+                                 f"— score {candidate.score:.2f}"):
+                    st.write(", ".join(candidate.reasons))
+                    col1, col2 = st.columns(2)
+                    for col, keep, drop in ((col1, first, second), (col2, second, first)):
+                        with col:
+                            st.write(f"**{keep.id}**: {keep.name}, {keep.age}, {keep.contact}")
+                            if st.button(f"Keep {keep.id}, merge {drop.id} into it",
+                                         key=f"merge_{keep.id}_{drop.id}_{index}"):
+                                merge_patients(st.session_state.patient_list, keep.id, drop.id,
+                                               actor='patient-management')
+                                st.session_state.duplicate_candidates = [
+                                    c for c in candidates if drop.id not in (c.first_id, c.second_id)]
+                                st.success(f"Merged {drop.id} into {keep.id}")
+                                st.rerun()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,149 @@
+# profile_startup.py
+"""Startup profiler for the Streamlit pages.
+
+    python profile_startup.py
+    python profile_startup.py --page Home.py --runs 5
+
+Every page is run headless with Streamlit's AppTest in a fresh interpreter
+started with ``-X importtime``. Reported per page, as medians over the runs:
+
+    cold    process start to the end of the first render, the import time
+            behind it, and the first render itself
+    warm    a new session in the already warm process (what the next visitor
+            pays), and a rerun of the first session (what every click pays)
+
+plus the packages whose imports cost the most. The data files are copied
+into a temporary directory first, so profiling never touches the real ones.
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATTERNS = ('*.json', '*.jsonl', '*.jsonl.idx', 'patients_archive.*')
+RENDER_TIMEOUT = 120
+
+
+def pages() -> List[str]:
+    return ['Home.py'] + sorted(os.path.relpath(path, APP_DIR)
+                                for path in glob.glob(os.path.join(APP_DIR, 'pages', '*.py')))
+
+
+def child(page: str):
+    """Render one page twice in one session and once in a second session,
+    printing the timings as JSON"""
+    sys.path.insert(0, APP_DIR)
+    already_loaded = {name.split('.')[0] for name in sys.modules}
+    from streamlit.testing.v1 import AppTest
+    timings = {}
+
+    path = os.path.join(APP_DIR, page)
+    app = AppTest.from_file(path, default_timeout=RENDER_TIMEOUT)
+    for label, session in (('first_render', app), ('rerun', app),
+                           ('new_session', AppTest.from_file(path, default_timeout=RENDER_TIMEOUT))):
+        started = time.perf_counter()
+        session.run()
+        timings[label] = time.perf_counter() - started
+    timings['errors'] = [error.message for error in app.exception]
+    timings['already_loaded'] = sorted(already_loaded)
+    print(json.dumps(timings))
+
+
+def parse_importtime(stderr: str, skip=()) -> Dict[str, float]:
+    """Seconds of top-level imports, summed per root package, leaving out
+    packages in ``skip``"""
+    packages: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2][1:]
+        if name.startswith(' '):
+            continue  # nested import, already counted in its parent
+        root = name.split('.')[0]
+        if root in skip:
+            continue
+        packages[root] = packages.get(root, 0.0) + int(fields[1]) / 1e6
+    return packages
+
+
+def profile(page: str, data_dir: str) -> Dict:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--child', page],
+        cwd=data_dir, capture_output=True, text=True)
+    process = time.perf_counter() - started
+    lines = result.stdout.strip().splitlines()
+    if result.returncode or not lines:
+        raise RuntimeError(f'{page} failed:\n{result.stderr[-2000:]}')
+    timings = json.loads(lines[-1])
+    # The child exits after two more renders; count only up to the first one
+    timings['process'] = process - timings['rerun'] - timings['new_session']
+    # Interpreter startup and the profiler's own imports are not the page's
+    timings['imports'] = parse_importtime(result.stderr, set(timings['already_loaded']))
+    return timings
+
+
+def report(page: str, runs: List[Dict], top: int):
+    def median(key):
+        return statistics.median(run[key] for run in runs)
+
+    imports: Dict[str, List[float]] = {}
+    for run in runs:
+        for package, seconds in run['imports'].items():
+            imports.setdefault(package, []).append(seconds)
+    heaviest = sorted(((statistics.median(values), package) for package, values in imports.items()),
+                      reverse=True)
+
+    print(page)
+    print(f"  cold:  {median('process') * 1000:8.0f} ms to first render "
+          f"(imports {sum(seconds for seconds, _ in heaviest) * 1000:.0f} ms, "
+          f"render {median('first_render') * 1000:.0f} ms)")
+    print(f"  warm:  {median('new_session') * 1000:8.0f} ms new session, "
+          f"{median('rerun') * 1000:.0f} ms rerun")
+    print('  imports: ' + ', '.join(f'{package} {seconds * 1000:.0f} ms'
+                                    for seconds, package in heaviest[:top]))
+    for error in runs[-1]['errors']:
+        print(f'  exception: {error}')
+
+
+def copy_data(target: str):
+    for pattern in DATA_PATTERNS:
+        for path in glob.glob(os.path.join(APP_DIR, pattern)):
+            shutil.copy2(path, target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile cold and warm start of the Streamlit pages')
+    parser.add_argument('--page', action='append', dest='pages',
+                        help='Page to profile, relative to this directory; repeat for several '
+                             '(default: Home.py and every page)')
+    parser.add_argument('--runs', type=int, default=3, help='Fresh processes per page')
+    parser.add_argument('--top', type=int, default=8, help='Heaviest imports to list')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        copy_data(data_dir)
+        # The first run may rebuild the archive and rollup files; keep it out of the numbers
+        profile('Home.py', data_dir)
+        for page in args.pages or pages():
+            report(page, [profile(page, data_dir) for _ in range(args.runs)], args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
 # shared/__init__.py
-from .models import Doctor, Patient, DoctorList, PatientList
+import importlib
 
 # Package metadata
 __version__ = '1.0.0'
@@ -11,4 +11,13 @@ __all__ = [
     'Patient',
     'DoctorList',
     'PatientList'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    # Resolved on first access so "import shared" does not load the models
+    if name in __all__:
+        value = getattr(importlib.import_module('.models', __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
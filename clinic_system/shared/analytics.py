@@ -0,0 +1,138 @@
+# shared/analytics.py
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+UNASSIGNED = 'Unassigned'
+
+_rollups: Dict[str, 'VisitRollups'] = {}
+_rollups_lock = threading.Lock()
+
+
+def get_rollups(path: str = 'rollups.json') -> 'VisitRollups':
+    """Return the shared rollups for a file, so sessions count into one set
+    of tables instead of overwriting each other's saves"""
+    key = os.path.abspath(path)
+    with _rollups_lock:
+        if key not in _rollups:
+            _rollups[key] = VisitRollups(path)
+        return _rollups[key]
+
+
+def _bump(table: Dict[str, int], key: str, amount: int = 1):
+    count = table.get(key, 0) + amount
+    if count > 0:
+        table[key] = count
+    else:
+        table.pop(key, None)
+
+
+def _top(table: Dict[str, int], n: int) -> List[Tuple[str, int]]:
+    return sorted(table.items(), key=lambda item: (-item[1], item[0]))[:n]
+
+
+class VisitRollups:
+    """Running visit counts kept up to date by PatientList.
+
+    Each medical record adds one to its day, diagnosis, prescription and
+    doctor buckets, and to the per-doctor diagnosis and prescription
+    buckets; removing a patient or replacing their history takes the old
+    records back out. The dashboard reads these buckets, so its cost
+    depends on how many distinct days, diagnoses and doctors there are, not
+    on how many records were ever written. The tables are saved to
+    rollups.json next to the data files. If that file is missing, the
+    tables are rebuilt once from patient histories. Call rebuild() after
+    editing histories by other means. Use get_rollups() rather than opening
+    a second instance on the same file. All methods are thread-safe.
+    """
+
+    TABLES = ('day', 'diagnosis', 'prescription', 'doctor',
+              'doctor_diagnosis', 'doctor_prescription')
+
+    def __init__(self, path: str = 'rollups.json'):
+        self.path = path
+        self.total = 0
+        self.tables: Dict[str, Dict] = {name: {} for name in self.TABLES}
+        self._lock = threading.RLock()
+        self.loaded = self.load_data()
+
+    def add(self, record: Dict, doctor: str = ''):
+        """Count one medical record"""
+        self._count(record, doctor, 1)
+
+    def remove(self, record: Dict, doctor: str = ''):
+        """Take back a record counted by add() with the same doctor"""
+        self._count(record, doctor, -1)
+
+    def _count(self, record: Dict, doctor: str, amount: int):
+        doctor = record.get('doctor') or doctor or UNASSIGNED
+        day = str(record.get('date', ''))[:10]
+        diagnosis = str(record.get('diagnosis', '')).strip()
+        prescription = str(record.get('prescription', '')).strip()
+
+        with self._lock:
+            self.total = max(0, self.total + amount)
+            _bump(self.tables['doctor'], doctor, amount)
+            if day:
+                _bump(self.tables['day'], day, amount)
+            for field, value in (('diagnosis', diagnosis), ('prescription', prescription)):
+                if not value:
+                    continue
+                _bump(self.tables[field], value, amount)
+                per_doctor = self.tables['doctor_' + field]
+                _bump(per_doctor.setdefault(doctor, {}), value, amount)
+                if not per_doctor[doctor]:
+                    del per_doctor[doctor]
+
+    def rebuild(self, patients: Iterable):
+        """Recount every record from scratch"""
+        with self._lock:
+            self.total = 0
+            self.tables = {name: {} for name in self.TABLES}
+            for patient in patients:
+                for record in patient.medical_history:
+                    self.add(record, patient.assigned_doctor)
+            self.loaded = True
+            self.save_data()
+
+    def visits_per_day(self, start: Optional[str] = None,
+                       end: Optional[str] = None) -> List[Tuple[str, int]]:
+        """(day, visits) in date order, optionally limited to start <= day <= end"""
+        with self._lock:
+            return sorted((day, count) for day, count in self.tables['day'].items()
+                          if (not start or day >= start) and (not end or day <= end))
+
+    def top_diagnoses(self, n: int = 10, doctor: Optional[str] = None) -> List[Tuple[str, int]]:
+        with self._lock:
+            if doctor:
+                return _top(self.tables['doctor_diagnosis'].get(doctor, {}), n)
+            return _top(self.tables['diagnosis'], n)
+
+    def top_prescriptions(self, n: int = 10, doctor: Optional[str] = None) -> List[Tuple[str, int]]:
+        with self._lock:
+            if doctor:
+                return _top(self.tables['doctor_prescription'].get(doctor, {}), n)
+            return _top(self.tables['prescription'], n)
+
+    def visits_by_doctor(self) -> List[Tuple[str, int]]:
+        with self._lock:
+            return _top(self.tables['doctor'], len(self.tables['doctor']))
+
+    def save_data(self):
+        """Save rollup tables to JSON file"""
+        with self._lock:
+            with open(self.path, 'w') as f:
+                json.dump({'total': self.total, 'tables': self.tables}, f)
+
+    def load_data(self) -> bool:
+        """Load rollup tables from JSON file"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+        self.total = data.get('total', 0)
+        for name in self.TABLES:
+            self.tables[name] = data.get('tables', {}).get(name, {})
+        return True
@@ -0,0 +1,283 @@
+# shared/audit.py
+import json
+from array import array
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from .filelock import locked
+
+Timestamp = Union[float, datetime]
+
+_logs: Dict[str, 'AuditLog'] = {}
+_logs_lock = threading.Lock()
+
+
+def get_audit_log(path: str = 'audit.jsonl') -> 'AuditLog':
+    """Return the shared audit log for a file, so every list in the process
+    appends through the same index"""
+    key = os.path.abspath(path)
+    with _logs_lock:
+        if key not in _logs:
+            _logs[key] = AuditLog(path)
+        return _logs[key]
+
+
+def _to_seconds(value: Timestamp) -> float:
+    return value.timestamp() if isinstance(value, datetime) else float(value)
+
+
+class AuditLog:
+    """Append-only log of field-level changes to doctors and patients.
+
+    Each line is one JSON entry:
+
+        {"t": 1700000000.0, "k": "patient", "id": "11", "op": "update",
+         "by": "admin", "d": {"contact": ["010", "011"]}}
+
+    ``op`` is one of ``create``/``baseline`` (``d`` holds every field),
+    ``update`` (``d`` maps field -> [old, new]), ``append`` (``d`` maps a list
+    field to the appended item), ``remove`` and ``rename``.
+
+    An update that changes ``id`` ends the record under the old ID and is
+    followed by a ``rename`` entry under the new one (``d`` holds ``from``,
+    the old ID, and ``state``, every field), so queries on the new ID carry
+    the old history.
+
+    ``<path>.idx`` is a sidecar index with one ``[t, offset, kind, id]``
+    line per entry (plus the old ID for a rename), so opening the log reads
+    that instead of parsing every entry. Only the timestamp, byte offset
+    and record of each entry are kept in memory; entry bodies are read back
+    from disk when a query needs them. record() is thread-safe, since one
+    log is shared by every session in the process. Other processes (the API
+    next to the UI) may append to the same files: appends hold an exclusive
+    lock on the log, and every query first indexes the entries written
+    since the last one.
+    """
+
+    def __init__(self, path: str = 'audit.jsonl'):
+        self.path = path
+        self.index_path = path + '.idx'
+        self._lock = threading.RLock()
+        self._file = open(self.path, 'ab')
+        self._reader = open(self.path, 'rb')
+        self._index_file = open(self.index_path, 'ab')
+        self._index_reader = open(self.index_path, 'rb')
+        with locked(self._file):
+            self._reset()
+            self._catch_up()
+            # Nobody can be mid-write while we hold the lock, so anything
+            # past the last whole line is a torn write
+            self._index_file.truncate(self._index_size)
+            if self.offsets and self.offsets[-1] >= os.fstat(self._reader.fileno()).st_size:
+                # The sidecar does not belong to this log; rebuild it
+                self._reset()
+                self._index_file.truncate(0)
+            self._index_log_tail()
+
+    def _reset(self):
+        self.times = array('d')
+        self.offsets = array('q')
+        # kind -> id -> position, or list of positions once there are several
+        self.entities: Dict[str, Dict[str, Union[int, List[int]]]] = {}
+        self.renames: Dict[Tuple[str, str], List[Tuple[int, str]]] = {}  # -> (position, old ID)
+        self._index_size = 0  # bytes of the sidecar already applied
+
+    def _index_log_tail(self):
+        """Index log entries the sidecar does not cover: a log written before
+        the sidecar existed, or a crash between the two writes. A torn final
+        entry is dropped."""
+        end = 0
+        if self.offsets:
+            self._reader.seek(self.offsets[-1])
+            end = self.offsets[-1] + len(self._reader.readline())
+        self._reader.seek(end)
+        lines = []
+        for line in self._reader:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            item = [entry['t'], end, entry['k'], entry['id']]
+            if entry['op'] == 'rename':
+                item.append(entry['d']['from'])
+            self._index(*item)
+            lines.append(json.dumps(item, separators=(',', ':')) + '\n')
+            end += len(line)
+        self._file.truncate(end)
+        if lines:
+            self._append_index(''.join(lines))
+
+    def _catch_up(self):
+        """Apply sidecar lines appended since the last call, by any process"""
+        if os.fstat(self._index_reader.fileno()).st_size <= self._index_size:
+            return
+        self._index_reader.seek(self._index_size)
+        data = self._index_reader.read()
+        data = data[:data.rfind(b'\n') + 1]  # a partial line is still being written
+        try:
+            items = json.loads(b'[' + data.rstrip(b'\n').replace(b'\n', b',') + b']')
+        except ValueError:
+            items = []
+            for line in data.splitlines():
+                try:
+                    items.append(json.loads(line))
+                except ValueError:
+                    break
+            data = b''.join(line + b'\n' for line in data.splitlines()[:len(items)])
+        for item in items:
+            self._index(*item)
+        self._index_size += len(data)
+
+    def _refresh(self):
+        with self._lock:
+            self._catch_up()
+
+    def _index(self, timestamp: float, offset: int, kind: str, entity_id: str,
+               renamed_from: Optional[str] = None):
+        position = len(self.times)
+        self.times.append(timestamp)
+        self.offsets.append(offset)
+        ids = self.entities.setdefault(kind, {})
+        positions = ids.get(entity_id)
+        if positions is None:
+            ids[entity_id] = position
+        elif isinstance(positions, int):
+            ids[entity_id] = [positions, position]
+        else:
+            positions.append(position)
+        if renamed_from is not None:
+            self.renames.setdefault((kind, entity_id), []).append((position, renamed_from))
+
+    def _append_index(self, lines: str):
+        data = lines.encode('utf-8')
+        self._index_file.write(data)
+        self._index_file.flush()
+        self._index_size += len(data)
+
+    def record(self, kind: str, entity_id: str, op: str, delta: Dict, actor: str = ''):
+        """Append one entry. Timestamps never go backwards so the time index
+        stays sorted even if the wall clock is adjusted."""
+        with self._lock, locked(self._file):
+            self._catch_up()
+            now = time.time()
+            if self.times and now < self.times[-1]:
+                now = self.times[-1]
+            entry = {'t': now, 'k': kind, 'id': entity_id, 'op': op, 'by': actor, 'd': delta}
+            line = json.dumps(entry, separators=(',', ':'), default=str).encode() + b'\n'
+
+            # The real end of the file; another process may have appended
+            offset = self._file.seek(0, os.SEEK_END)
+            self._file.write(line)
+            self._file.flush()
+            item = [now, offset, kind, entity_id]
+            if op == 'rename':
+                item.append(delta['from'])
+            self._index(*item)
+            # The entry is on disk before the sidecar line that points at it
+            self._append_index(json.dumps(item, separators=(',', ':')) + '\n')
+
+    def has_history(self, kind: str, entity_id: str) -> bool:
+        self._refresh()
+        return entity_id in self.entities.get(kind, ())
+
+    def _entity_positions(self, kind: str, entity_id: str) -> List[int]:
+        positions = self.entities.get(kind, {}).get(entity_id)
+        if positions is None:
+            return []
+        return [positions] if isinstance(positions, int) else positions
+
+    def _positions(self, kind: str, entity_id: str,
+                   before: Optional[int] = None) -> Tuple[List[int], Set[str]]:
+        """Positions of a record's entries, oldest first, together with the
+        entries it had under the IDs it was renamed from; and those IDs"""
+        positions = self._entity_positions(kind, entity_id)
+        if before is not None:
+            positions = positions[:bisect_left(positions, before)]
+        renames = self.renames.get((kind, entity_id))
+        if not renames:
+            return positions, {entity_id}
+        merged, ids = set(positions), {entity_id}
+        for position, old_id in renames:
+            if before is not None and position >= before:
+                break
+            old_positions, old_ids = self._positions(kind, old_id, position)
+            merged.update(old_positions)
+            ids.update(old_ids)
+        return sorted(merged), ids
+
+    def _read(self, positions, kind: Optional[str] = None,
+              ids: Optional[Set[str]] = None) -> List[Dict]:
+        """Entries at the given positions, skipping any that are not for
+        ``kind`` and one of ``ids`` (an index that went stale would point
+        at someone else's entry)"""
+        entries = []
+        with self._lock:
+            for position in positions:
+                self._reader.seek(self.offsets[position])
+                entry = json.loads(self._reader.readline())
+                if (kind is None or entry['k'] == kind) and (ids is None or entry['id'] in ids):
+                    entries.append(entry)
+        return entries
+
+    def changes_between(self, start: Timestamp, end: Timestamp, kind: Optional[str] = None,
+                        entity_id: Optional[str] = None) -> List[Dict]:
+        """All entries with start <= t <= end, oldest first"""
+        start, end = _to_seconds(start), _to_seconds(end)
+        self._refresh()
+        ids = None
+        if entity_id is not None:
+            positions, ids = self._positions(kind, entity_id)
+            times = [self.times[p] for p in positions]
+            positions = positions[bisect_left(times, start):bisect_right(times, end)]
+        else:
+            positions = range(bisect_left(self.times, start), bisect_right(self.times, end))
+        return self._read(positions, kind, ids)
+
+    def history(self, kind: str, entity_id: str) -> List[Dict]:
+        """Every entry for one doctor or patient, oldest first, including those
+        from before it was renamed"""
+        self._refresh()
+        positions, ids = self._positions(kind, entity_id)
+        return self._read(positions, kind, ids)
+
+    def state_at(self, kind: str, entity_id: str, at: Timestamp) -> Optional[Dict]:
+        """Rebuild a record as it was at time ``at`` by replaying its deltas.
+
+        Returns None if the record did not exist then, or went by another ID
+        at the time, or if its first audit entry is later than ``at`` (records that predate the audit log get a
+        ``baseline`` entry the first time they change).
+        """
+        at = _to_seconds(at)
+        self._refresh()
+        positions, ids = self._positions(kind, entity_id)
+        times = [self.times[p] for p in positions]
+        state, current_id = None, entity_id
+        for entry in self._read(positions[:bisect_right(times, at)], kind, ids):
+            op, delta, current_id = entry['op'], entry['d'], entry['id']
+            if op in ('create', 'baseline'):
+                state = dict(delta)
+            elif op == 'rename':
+                state = dict(delta['state'])
+            elif op == 'remove' or (op == 'update' and 'id' in delta):
+                state = None
+            elif state is not None and op == 'update':
+                for field, (old, new) in delta.items():
+                    state[field] = new
+            elif state is not None and op == 'append':
+                for field, item in delta.items():
+                    state[field] = list(state.get(field) or []) + [item]
+        # An ID that was renamed away and later back did not exist in between
+        return state if current_id == entity_id else None
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._reader.close()
+            self._index_file.close()
+            self._index_reader.close()
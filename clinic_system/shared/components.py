@@ -1,6 +1,106 @@
 # shared/components.py
+import threading
+from collections import OrderedDict
 import streamlit as st
-import pandas as pd
+from .schedule import format_hours
+
+
+class RenderCache:
+    """Size-bounded LRU of rendered card markup.
+
+    Keys are (kind, record ID, record version). Every change to a record
+    stamps a new version, so an entry can never go stale; old versions
+    simply age out of the LRU. The cache is shared by all sessions of the
+    process, hence the lock.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'entries': len(self._entries), 'max_entries': self.max_entries}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+render_cache = RenderCache()
+
+
+def render_cache_stats():
+    return render_cache.stats()
+
+
+def _build_patient_card(patient):
+    header = f"""
+            <div class="patient-card">
+                <h3>{patient.name} (ID: {patient.id})</h3>
+            </div>
+        """
+    basic = f"📊 Basic Information  \nAge: {patient.age}  \nGender: {patient.gender}"
+    contact = f"📞 Contact Details  \nContact: {patient.contact}  \nEmergency: {patient.emergency_contact}"
+    care = f"👨‍⚕️ Medical Care  \nAssigned Doctor: {patient.assigned_doctor}"
+    history = "".join(f"""
+                        <div class="medical-history">
+                            <p><strong>Date:</strong> {record['date']}</p>
+                            <p><strong>Diagnosis:</strong> {record['diagnosis']}</p>
+                            <p><strong>Prescription:</strong> {record['prescription']}</p>
+                        </div>
+                    """ for record in patient.medical_history)
+    return header, basic, contact, care, history
+
+
+def patient_card_markup(patient):
+    """(header, basic info, contact, medical care, history) markup for a patient"""
+    return render_cache.get(('patient', patient.id, patient.version),
+                            lambda: _build_patient_card(patient))
+
+
+def _build_doctor_card(doctor):
+    notes = getattr(doctor, 'notes', '')
+    return {
+        'title': f"Dr. {doctor.name} ({doctor.specialization})",
+        'contact': f"*Contact Information*  \n📞 Phone: {doctor.contact}  \n"
+                   f"🚨 Emergency Contact: {doctor.emergency_contact}",
+        'details': f"*Professional Details*  \n📅 Working Days: {', '.join(doctor.schedule)}  \n"
+                   f"🕘 Working Hours: {format_hours(doctor.working_hours)}",
+        'notes': f"*Additional Notes*  \n{notes}" if notes else "",
+    }
+
+
+def doctor_card_markup(doctor):
+    """Title and section markup for a doctor's expander"""
+    return render_cache.get(('doctor', doctor.id, doctor.version),
+                            lambda: _build_doctor_card(doctor))
+
+
+def _pandas():
+    """pandas is only needed for tables, so it is imported on first use"""
+    import pandas
+    return pandas
+
 
 def render_stats_cards(title, value, icon):
     st.markdown(f"""
@@ -12,7 +112,7 @@ def render_stats_cards(title, value, icon):
 
 def render_doctor_table(doctors):
     if isinstance(doctors, list):
-        df = pd.DataFrame([{
+        df = _pandas().DataFrame([{
             'ID': d.id,
             'Name': d.name,
             'Specialization': d.specialization,
@@ -20,7 +120,7 @@ def render_doctor_table(doctors):
             'Schedule': ', '.join(d.schedule)
         } for d in doctors])
     else:
-        df = pd.DataFrame([{
+        df = _pandas().DataFrame([{
             'ID': doctors.id,
             'Name': doctors.name,
             'Specialization': doctors.specialization,
@@ -31,41 +131,26 @@ def render_doctor_table(doctors):
     st.dataframe(df, use_container_width=True)
 
 def render_patient_record(patient):
+    header, basic, contact, care, history = patient_card_markup(patient)
     with st.container():
-        st.markdown(f"""
-            <div class="patient-card">
-                <h3>{patient.name} (ID: {patient.id})</h3>
-            </div>
-        """, unsafe_allow_html=True)
+        st.markdown(header, unsafe_allow_html=True)
         
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.write("📊 Basic Information")
-            st.write(f"Age: {patient.age}")
-            st.write(f"Gender: {patient.gender}")
+            st.markdown(basic)
         with col2:
-            st.write("📞 Contact Details")
-            st.write(f"Contact: {patient.contact}")
-            st.write(f"Emergency: {patient.emergency_contact}")
+            st.markdown(contact)
         with col3:
-            st.write("👨‍⚕️ Medical Care")
-            st.write(f"Assigned Doctor: {patient.assigned_doctor}")
+            st.markdown(care)
             
         with st.expander("Medical History"):
-            if patient.medical_history:
-                for record in patient.medical_history:
-                    st.markdown(f"""
-                        <div class="medical-history">
-                            <p><strong>Date:</strong> {record['date']}</p>
-                            <p><strong>Diagnosis:</strong> {record['diagnosis']}</p>
-                            <p><strong>Prescription:</strong> {record['prescription']}</p>
-                        </div>
-                    """, unsafe_allow_html=True)
+            if history:
+                st.markdown(history, unsafe_allow_html=True)
             else:
                 st.info("No medical history available.")
 
 def render_patient_table(patients):
-    df = pd.DataFrame([{
+    df = _pandas().DataFrame([{
         'ID': p.id,
         'Name': p.name,
         'Age': p.age,
@@ -0,0 +1,246 @@
+# shared/dedupe.py
+import re
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+AGE_BAND_YEARS = 5
+MAX_BLOCK_SIZE = 200  # larger blocks fall back to a sorted window
+WINDOW_SIZE = 20
+DEFAULT_THRESHOLD = 0.8
+NAME_ONLY_MAX = 0.75  # best score possible without any phone evidence
+
+_NON_DIGITS = re.compile(r'\D')
+_NON_LETTERS = re.compile(r'[^\w\s]|\d|_')
+_SOUNDEX_CODES = {
+    letter: digit
+    for digit, letters in (('1', 'bfpv'), ('2', 'cgjkqsxz'), ('3', 'dt'),
+                           ('4', 'l'), ('5', 'mn'), ('6', 'r'))
+    for letter in letters
+}
+
+
+@dataclass
+class DuplicateCandidate:
+    first_id: str
+    second_id: str
+    score: float
+    reasons: List[str] = field(default_factory=list)
+
+
+def normalize_phone(contact: str, digits: int = 9) -> str:
+    """Last ``digits`` digits of a number, so +20 10..., 010... and 10... agree.
+    Numbers too short to identify anyone return an empty string."""
+    number = contact or ''
+    if not number.isdigit():
+        number = _NON_DIGITS.sub('', number)
+    return number[-digits:] if len(number) >= 7 else ''
+
+
+def normalize_name(name: str) -> str:
+    lowered = (name or '').lower()
+    if not lowered.replace(' ', '').isalpha():
+        lowered = _NON_LETTERS.sub(' ', lowered)
+    return ' '.join(lowered.split())
+
+
+@lru_cache(maxsize=65536)
+def soundex(word: str) -> str:
+    """American Soundex code; non-Latin words are returned as they are"""
+    letters = ''.join(c for c in word if 'a' <= c <= 'z')
+    if not letters:
+        return word
+    code = letters[0].upper()
+    last = _SOUNDEX_CODES.get(letters[0], '')
+    for c in letters[1:]:
+        digit = _SOUNDEX_CODES.get(c, '')
+        if digit and digit != last:
+            code += digit
+            if len(code) == 4:
+                break
+        if c not in 'hw':
+            last = digit
+    return code.ljust(4, '0')
+
+
+def name_key(normalized: str) -> str:
+    """Phonetic code of the first and last name"""
+    tokens = normalized.split()
+    if not tokens:
+        return ''
+    if len(tokens) == 1:
+        return soundex(tokens[0])
+    return soundex(tokens[0]) + soundex(tokens[-1])
+
+
+def _age(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _Entry:
+    __slots__ = ('id', 'name', 'phone', 'age', 'gender')
+
+    def __init__(self, patient):
+        self.id = patient.id
+        self.name = normalize_name(patient.name)
+        self.phone = normalize_phone(patient.contact)
+        self.age = _age(patient.age)
+        self.gender = patient.gender
+
+
+def _one_digit_apart(a: str, b: str) -> bool:
+    if len(a) != len(b) or not a:
+        return False
+    # A single typo leaves one half intact, which rules out most pairs cheaply
+    half = len(a) // 2
+    if a[:half] != b[:half] and a[half:] != b[half:]:
+        return False
+    return sum(x != y for x, y in zip(a, b)) == 1
+
+
+def _score(a: _Entry, b: _Entry, threshold: float) -> Optional[Tuple[float, List[str]]]:
+    """Weighted match score: name 0.6, phone 0.25 (0.15 for a one-digit
+    typo), age within a year 0.1, gender 0.05"""
+    same_phone = bool(a.phone) and a.phone == b.phone
+    close_age = a.age is not None and b.age is not None and abs(a.age - b.age) <= 1
+    same_gender = a.gender == b.gender
+    rest = 0.25 * same_phone + 0.1 * close_age + 0.05 * same_gender
+
+    # Cheap upper bounds first; the full ratio is only computed when it matters
+    near_phone = False
+    if not same_phone:
+        if rest + 0.75 < threshold:
+            return None
+        near_phone = _one_digit_apart(a.phone, b.phone)
+        rest += 0.15 * near_phone
+    if rest + 0.6 < threshold:
+        return None
+    matcher = SequenceMatcher(None, a.name, b.name)
+    if rest + 0.6 * matcher.real_quick_ratio() < threshold or \
+            rest + 0.6 * matcher.quick_ratio() < threshold:
+        return None
+    similarity = matcher.ratio()
+    score = rest + 0.6 * similarity
+    if score < threshold:
+        return None
+
+    reasons = [f"name {similarity:.0%} similar"]
+    if same_phone:
+        reasons.append("same phone")
+    elif near_phone:
+        reasons.append("phone differs by one digit")
+    if close_age:
+        reasons.append("same age" if a.age == b.age else "age within a year")
+    if same_gender:
+        reasons.append("same gender")
+    return score, reasons
+
+
+def _block_pairs(members: List[_Entry]):
+    if len(members) <= MAX_BLOCK_SIZE:
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                yield members[i], members[j]
+    else:
+        # Shared placeholder numbers and very common names make huge blocks;
+        # only compare neighbours in name order there
+        members = sorted(members, key=lambda e: e.name)
+        for i in range(len(members)):
+            for j in range(i + 1, min(i + 1 + WINDOW_SIZE, len(members))):
+                yield members[i], members[j]
+
+
+def _phone_half_pairs(members: List[_Entry]):
+    """Pairs whose phones could be equal or one digit apart: they must share
+    the first or the second half of the number"""
+    halves: Dict[tuple, List[_Entry]] = {}
+    for entry in members:
+        if entry.phone:
+            half = len(entry.phone) // 2
+            halves.setdefault((0, entry.phone[:half]), []).append(entry)
+            halves.setdefault((1, entry.phone[half:]), []).append(entry)
+    for group in halves.values():
+        if len(group) > 1:
+            yield from _block_pairs(group)
+
+
+def find_duplicates(patients: Iterable, threshold: float = DEFAULT_THRESHOLD) -> List[DuplicateCandidate]:
+    """Likely duplicate patients, best matches first.
+
+    Patients are grouped by two blocking keys: normalized phone number, and
+    phonetic name code plus age band. Pairs are only scored inside a block,
+    so the work grows with block sizes instead of with the square of the
+    patient count. A patient sits in at most one block per key, so a pair
+    can only meet twice when it shares a phone; the name blocks skip those.
+    Above NAME_ONLY_MAX a match needs phone evidence, so name blocks then only
+    pair patients whose numbers share a half.
+    """
+    blocks: Dict[tuple, List[_Entry]] = {}
+    for patient in patients:
+        entry = _Entry(patient)
+        if entry.phone:
+            blocks.setdefault(('phone', entry.phone), []).append(entry)
+        key = name_key(entry.name)
+        if key:
+            band = entry.age // AGE_BAND_YEARS if entry.age is not None else None
+            blocks.setdefault(('name', key, band), []).append(entry)
+
+    candidates = []
+    for key, members in blocks.items():
+        if len(members) < 2:
+            continue
+        by_name = key[0] == 'name'
+        if by_name and threshold > NAME_ONLY_MAX:
+            pairs = _phone_half_pairs(members)
+        else:
+            pairs = _block_pairs(members)
+        for a, b in pairs:
+            if by_name and a.phone and a.phone == b.phone:
+                continue
+            result = _score(a, b, threshold)
+            if result:
+                first, second = (a, b) if a.id < b.id else (b, a)
+                candidates.append(DuplicateCandidate(first.id, second.id, round(result[0], 3), result[1]))
+
+    candidates.sort(key=lambda c: c.score, reverse=True)
+    return candidates
+
+
+def merge_patients(patient_list, keep_id: str, duplicate_id: str, actor: str = '') -> bool:
+    """Fold a duplicate registration into the record being kept.
+
+    Empty fields on the kept record are filled from the duplicate, medical
+    records it does not already have are appended, notes are combined, and
+    the duplicate is removed. Both steps go through the normal update and
+    remove paths, so the merge shows up in the audit log.
+    """
+    keep = patient_list.find_patient(keep_id)
+    duplicate = patient_list.find_patient(duplicate_id)
+    if not keep or not duplicate or keep is duplicate:
+        return False
+
+    updates = {}
+    for key in ('name', 'gender', 'contact', 'assigned_doctor', 'emergency_contact'):
+        if not getattr(keep, key) and getattr(duplicate, key):
+            updates[key] = getattr(duplicate, key)
+    if not keep.age and duplicate.age:
+        updates['age'] = duplicate.age
+
+    history = list(keep.medical_history)
+    for record in duplicate.medical_history:
+        if record not in history:
+            history.append(record)
+    if len(history) != len(keep.medical_history):
+        updates['medical_history'] = history
+
+    if duplicate.notes and duplicate.notes not in keep.notes:
+        updates['notes'] = f"{keep.notes}\n{duplicate.notes}".strip()
+
+    if updates:
+        patient_list.update_patient(keep_id, updates, actor=actor)
+    patient_list.remove_patient(duplicate_id, actor=actor)
+    return True
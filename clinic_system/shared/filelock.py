@@ -0,0 +1,43 @@
+# shared/filelock.py
+"""Advisory locks between processes that share the data files, such as the
+Streamlit app and the API.
+
+They use fcntl.flock. Where fcntl is missing (Windows) every call succeeds
+without locking, so there only one process may write the files at a time.
+"""
+import contextlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+@contextlib.contextmanager
+def locked(f):
+    """Hold an exclusive lock on an open file for the duration of the block"""
+    if fcntl is None:
+        yield
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def hold_shared(f):
+    """Take, or downgrade to, a shared lock that lasts until the file is closed"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+
+
+def try_exclusive(f) -> bool:
+    """Upgrade to an exclusive lock if nobody else holds one; never blocks"""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
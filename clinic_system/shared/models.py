@@ -1,7 +1,43 @@
 # shared/models.py
 import json
-from dataclasses import dataclass
-from typing import Optional, List, Dict
+import itertools
+import functools
+import threading
+import time
+from dataclasses import dataclass, field, fields
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Optional, List, Dict, Iterator, Mapping, Tuple
+from .audit import AuditLog, get_audit_log
+from .schedule import ScheduleIndex
+from .analytics import get_rollups
+from .storage import get_archive
+from .snapshot import CopyOnWriteDict, Snapshot
+
+HOT_CAPACITY = 5000  # patients kept in memory per PatientList
+
+# Archived patients keep their version, so start past any an earlier process handed out
+_versions = itertools.count(time.time_ns())
+
+
+def next_version() -> int:
+    """Process-wide increasing number stamped on records when built or changed"""
+    return next(_versions)
+
+
+def _locked(method):
+    """Run a list method under the list's lock so snapshot() never lands in
+    the middle of a write"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _freeze_history(history) -> Tuple[Mapping, ...]:
+    return tuple(MappingProxyType(dict(record)) for record in history)
+
 
 @dataclass
 class Doctor:
@@ -11,8 +47,52 @@ class Doctor:
     contact: str
     schedule: List[str]
     emergency_contact: str = ""
+    working_hours: Dict[str, str] = field(default_factory=dict)
+    version: int = field(default_factory=next_version, compare=False, repr=False)
     next: Optional['Doctor'] = None
 
+    def to_dict(self) -> Dict:
+        """Serialize the doctor without the list pointer"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'specialization': self.specialization,
+            'contact': self.contact,
+            'schedule': self.schedule,
+            'emergency_contact': self.emergency_contact,
+            'working_hours': self.working_hours
+        }
+
+    def freeze(self) -> 'FrozenDoctor':
+        """Immutable copy of the doctor's current state"""
+        return FrozenDoctor(self.id, self.name, self.specialization, self.contact,
+                            tuple(self.schedule), self.emergency_contact,
+                            MappingProxyType(dict(self.working_hours)), self.version)
+
+
+@dataclass(frozen=True)
+class FrozenDoctor:
+    """Read-only doctor as returned by snapshots"""
+    id: str
+    name: str
+    specialization: str
+    contact: str
+    schedule: Tuple[str, ...]
+    emergency_contact: str = ""
+    working_hours: Mapping[str, str] = field(default_factory=dict)
+    version: int = field(default=0, compare=False, repr=False)
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'specialization': self.specialization,
+            'contact': self.contact,
+            'schedule': list(self.schedule),
+            'emergency_contact': self.emergency_contact,
+            'working_hours': dict(self.working_hours)
+        }
+
 @dataclass
 class Patient:
     id: str
@@ -24,15 +104,108 @@ class Patient:
     assigned_doctor: str = ""
     emergency_contact: str = ""
     notes: str = ""
+    version: int = field(default_factory=next_version, compare=False, repr=False)
     next: Optional['Patient'] = None
 
+    def to_dict(self) -> Dict:
+        """Serialize the patient without the list pointer"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'age': self.age,
+            'gender': self.gender,
+            'contact': self.contact,
+            'medical_history': self.medical_history,
+            'assigned_doctor': self.assigned_doctor,
+            'emergency_contact': self.emergency_contact,
+            'notes': self.notes
+        }
+
+    def freeze(self) -> 'FrozenPatient':
+        """Immutable copy of the patient's current state"""
+        return FrozenPatient(self.id, self.name, self.age, self.gender, self.contact,
+                             _freeze_history(self.medical_history), self.assigned_doctor,
+                             self.emergency_contact, self.notes, self.version)
+
+
+@dataclass(frozen=True)
+class FrozenPatient:
+    """Read-only patient as returned by snapshots"""
+    id: str
+    name: str
+    age: int
+    gender: str
+    contact: str
+    medical_history: Tuple[Mapping, ...]
+    assigned_doctor: str = ""
+    emergency_contact: str = ""
+    notes: str = ""
+    version: int = field(default=0, compare=False, repr=False)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'FrozenPatient':
+        """Build from an archived record, keeping the version it was archived
+        with so repeated decodes of the same record share render cache entries"""
+        return cls(data['id'], data['name'], data['age'], data['gender'], data['contact'],
+                   _freeze_history(data.get('medical_history', [])),
+                   data.get('assigned_doctor', ''), data.get('emergency_contact', ''),
+                   data.get('notes', ''), data.get('version') or next_version())
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'age': self.age,
+            'gender': self.gender,
+            'contact': self.contact,
+            'medical_history': [dict(record) for record in self.medical_history],
+            'assigned_doctor': self.assigned_doctor,
+            'emergency_contact': self.emergency_contact,
+            'notes': self.notes
+        }
+
+# What an update may set: the stored fields, not the list pointer, version or methods
+_DOCTOR_FIELDS = frozenset(f.name for f in fields(Doctor)) - {'next', 'version'}
+_PATIENT_FIELDS = frozenset(f.name for f in fields(Patient)) - {'next', 'version'}
+
+
 class DoctorList:
-    def __init__(self):
+    def __init__(self, audit_log: Optional[AuditLog] = None):
+        self.audit = audit_log if audit_log is not None else get_audit_log()
         self.head = None
+        self.tail = None
+        self._index = {}  # id -> node, keeps IDs unique and lookups O(1)
+        self._frozen = CopyOnWriteDict()  # id -> FrozenDoctor, what snapshots see
+        self._schedule_index = None
+        self._lock = threading.RLock()
         self.load_data()
 
-    def add_doctor(self, doctor_data: Dict):
-        """Add a new doctor to the list"""
+    @_locked
+    def add_doctor(self, doctor_data: Dict, actor: str = '') -> bool:
+        """Add a new doctor to the list. Returns False if the ID is taken"""
+        doctor = self._make_doctor(doctor_data)
+        if doctor.id in self._index:
+            return False
+        self._append(doctor)
+        self.audit.record('doctor', doctor.id, 'create', doctor.to_dict(), actor)
+        self.save_data()
+        return True
+
+    @_locked
+    def add_doctors(self, doctors: List[Dict], actor: str = '') -> List[str]:
+        """Add several doctors and save once. Returns the IDs skipped as duplicates"""
+        skipped = []
+        for doctor_data in doctors:
+            doctor = self._make_doctor(doctor_data)
+            if doctor.id in self._index:
+                skipped.append(doctor.id)
+                continue
+            self._append(doctor)
+            self.audit.record('doctor', doctor.id, 'create', doctor.to_dict(), actor)
+        self.save_data()
+        return skipped
+
+    def _make_doctor(self, doctor_data) -> Doctor:
         if isinstance(doctor_data, dict):
             doctor = Doctor(
                 id=doctor_data['id'],
@@ -40,51 +213,93 @@ class DoctorList:
                 specialization=doctor_data['specialization'],
                 contact=doctor_data['contact'],
                 schedule=doctor_data['schedule'],
-                emergency_contact=doctor_data.get('emergency_contact', '')
+                emergency_contact=doctor_data.get('emergency_contact', ''),
+                working_hours=doctor_data.get('working_hours', {})
             )
         else:
             doctor = doctor_data
+        return doctor
 
+    def _append(self, doctor: Doctor):
+        self._index[doctor.id] = doctor
+        self._frozen[doctor.id] = doctor.freeze()
         if not self.head:
             self.head = doctor
         else:
-            current = self.head
-            while current.next:
-                current = current.next
-            current.next = doctor
-        self.save_data()
+            self.tail.next = doctor
+        self.tail = doctor
 
-    def remove_doctor(self, doctor_id: str) -> bool:
+    @_locked
+    def remove_doctor(self, doctor_id: str, actor: str = '') -> bool:
         """Remove a doctor from the list"""
-        if not self.head:
+        if doctor_id not in self._index:
             return False
+        del self._index[doctor_id]
+        del self._frozen[doctor_id]
 
         if self.head.id == doctor_id:
             self.head = self.head.next
+            if not self.head:
+                self.tail = None
+            self.audit.record('doctor', doctor_id, 'remove', {}, actor)
             self.save_data()
             return True
 
         current = self.head
         while current.next:
             if current.next.id == doctor_id:
+                if current.next is self.tail:
+                    self.tail = current
                 current.next = current.next.next
+                self.audit.record('doctor', doctor_id, 'remove', {}, actor)
                 self.save_data()
                 return True
             current = current.next
         return False
 
-    def update_doctor(self, doctor_id: str, updated_data: Dict) -> bool:
+    @_locked
+    def update_doctor(self, doctor_id: str, updated_data: Dict, actor: str = '') -> bool:
         """Update doctor information"""
-        current = self.head
-        while current:
-            if current.id == doctor_id:
-                for key, value in updated_data.items():
-                    if hasattr(current, key):
-                        setattr(current, key, value)
-                self.save_data()
-                return True
-            current = current.next
-        return False
+        current = self._index.get(doctor_id)
+        if not current:
+            return False
+        new_id = updated_data.get('id', doctor_id)
+        if new_id != doctor_id and new_id in self._index:
+            return False
+
+        self._audit_baseline(current)
+        changes = {}
+        for key, value in updated_data.items():
+            if key in _DOCTOR_FIELDS:
+                old = getattr(current, key)
+                if old != value:
+                    changes[key] = [old, value]
+                setattr(current, key, value)
+        current.version = next_version()
+        if new_id != doctor_id:
+            self._index[new_id] = self._index.pop(doctor_id)
+            del self._frozen[doctor_id]
+        self._frozen[new_id] = current.freeze()
+        if changes:
+            self.audit.record('doctor', doctor_id, 'update', changes, actor)
+        if new_id != doctor_id:
+            self.audit.record('doctor', new_id, 'rename', {'from': doctor_id, 'state': current.to_dict()},
+                              actor)
+        self.save_data()
+        return True
+
+    def _unique_id(self, doctor_id: str) -> str:
+        """Older files may repeat an ID; suffix the repeats instead of dropping them"""
+        candidate, n = doctor_id, 1
+        while candidate in self._index:
+            n += 1
+            candidate = f"{doctor_id}~{n}"
+        return candidate
+
+    def _audit_baseline(self, doctor: Doctor):
+        """Record the full state of a doctor that predates the audit log"""
+        if not self.audit.has_history('doctor', doctor.id):
+            self.audit.record('doctor', doctor.id, 'baseline', doctor.to_dict())
 
     def get_all_doctors(self) -> List[Doctor]:
         """Get all doctors in the list"""
@@ -97,50 +312,120 @@ class DoctorList:
 
     def find_doctor(self, doctor_id: str) -> Optional[Doctor]:
         """Find a doctor by ID"""
-        current = self.head
-        while current:
-            if current.id == doctor_id:
-                return current
-            current = current.next
-        return None
+        return self._index.get(doctor_id)
+
+    def has_doctor(self, doctor_id: str) -> bool:
+        """Check whether a doctor ID is taken"""
+        return doctor_id in self._index
+
+    @_locked
+    def snapshot(self) -> Snapshot:
+        """Consistent read-only view of all doctors as of now; cheap to take
+        and safe to read from any thread while the list keeps changing"""
+        return Snapshot(self._frozen.snapshot())
+
+    def schedule_index(self) -> ScheduleIndex:
+        """Availability index over the current doctors, rebuilt after changes"""
+        if self._schedule_index is None:
+            self._schedule_index = ScheduleIndex(self.get_all_doctors())
+        return self._schedule_index
 
     def save_data(self):
         """Save doctors data to JSON file"""
-        data = []
-        current = self.head
-        while current:
-            doctor_dict = {
-                'id': current.id,
-                'name': current.name,
-                'specialization': current.specialization,
-                'contact': current.contact,
-                'schedule': current.schedule,
-                'emergency_contact': current.emergency_contact
-            }
-            data.append(doctor_dict)
-            current = current.next
-        
+        self._schedule_index = None  # every mutation ends with a save
+        data = [doctor.to_dict() for doctor in self.get_all_doctors()]
+
         with open('doctors.json', 'w') as f:
             json.dump(data, f)
 
+    @_locked
     def load_data(self):
         """Load doctors data from JSON file"""
         try:
             with open('doctors.json', 'r') as f:
                 data = json.load(f)
                 self.head = None  # Reset the list
+                self.tail = None
+                self._schedule_index = None
+                self._index = {}
+                self._frozen = CopyOnWriteDict()
                 for doctor_dict in data:
-                    self.add_doctor(doctor_dict)
+                    doctor = self._make_doctor(doctor_dict)
+                    doctor.id = self._unique_id(doctor.id)
+                    self._append(doctor)
         except FileNotFoundError:
             pass
 
 class PatientList:
-    def __init__(self):
+    """Patients split into a hot working set and a cold archive.
+
+    The linked list holds at most ``hot_capacity`` recently used patients,
+    indexed by ID in least-recently-used order. When the set grows past its
+    budget the least recently used patients move to the compressed
+    ColdArchive, and find_patient faults them back in on access.
+    patients.json holds the hot set only.
+
+    snapshot() gives readers a consistent view without blocking writers.
+    Hot patients whose archived copy is missing or stale keep a frozen copy
+    of their current state in ``_dirty``; everyone else is read from the
+    archive. Both maps are copy-on-write, so a snapshot only pins the two
+    tables as they are, and writers copy a table the first time they
+    change it while a snapshot holds it.
+    """
+
+    def __init__(self, audit_log: Optional[AuditLog] = None, hot_capacity: int = HOT_CAPACITY):
+        self.audit = audit_log if audit_log is not None else get_audit_log()
+        self.hot_capacity = max(1, hot_capacity)
         self.head = None
+        self.tail = None
+        self._index = OrderedDict()  # hot id -> node, least recently used first
+        self._dirty = CopyOnWriteDict()  # hot id -> FrozenPatient, if the archived copy is missing or stale
+        self._lock = threading.RLock()
+        self.archive = get_archive()
         self.load_data()
+        self.rollups = get_rollups()
+        if not self.rollups.loaded:
+            self.rollups.rebuild(self.iter_patients())
+
+    @_locked
+    def add_patient(self, patient_data: Dict, actor: str = '') -> bool:
+        """Add a new patient to the list. Returns False if the ID is taken"""
+        patient = self._make_patient(patient_data)
+        if self._exists(patient.id):
+            return False
+        self._append(patient)
+        self._dirty[patient.id] = patient.freeze()
+        self.audit.record('patient', patient.id, 'create', patient.to_dict(), actor)
+        if patient.medical_history:
+            self._count_visits(patient)
+            self.rollups.save_data()
+        self._evict()
+        self.save_data()
+        return True
 
-    def add_patient(self, patient_data: Dict):
-        """Add a new patient to the list"""
+    @_locked
+    def add_patients(self, patients: List[Dict], actor: str = '') -> List[str]:
+        """Add several patients and save once. Returns the IDs skipped as duplicates"""
+        skipped = []
+        for patient_data in patients:
+            patient = self._make_patient(patient_data)
+            if self._exists(patient.id):
+                skipped.append(patient.id)
+                continue
+            self._append(patient)
+            self._dirty[patient.id] = patient.freeze()
+            self.audit.record('patient', patient.id, 'create', patient.to_dict(), actor)
+            self._count_visits(patient)
+            self._evict()
+        self.rollups.save_data()
+        self.save_data()
+        return skipped
+
+    def _count_visits(self, patient: Patient):
+        for record in patient.medical_history:
+            self.rollups.add(record, patient.assigned_doctor)
+
+    def _make_patient(self, patient_data) -> Patient:
         if isinstance(patient_data, dict):
             patient = Patient(
                 id=patient_data['id'],
@@ -155,121 +440,304 @@ class PatientList:
             )
         else:
             patient = patient_data
+        return patient
+
+    def _from_archive(self, data: Dict) -> Patient:
+        """Rebuild an archived patient with the version it was archived with"""
+        patient = self._make_patient(data)
+        if data.get('version'):
+            patient.version = data['version']
+        return patient
 
+    def _append(self, patient: Patient):
+        self._index[patient.id] = patient
         if not self.head:
             self.head = patient
         else:
-            current = self.head
-            while current.next:
-                current = current.next
-            current.next = patient
-        self.save_data()
+            self.tail.next = patient
+        self.tail = patient
 
-    def remove_patient(self, patient_id: str) -> bool:
-        """Remove a patient from the list"""
-        if not self.head:
-            return False
+    def _exists(self, patient_id: str) -> bool:
+        return patient_id in self._index or patient_id in self.archive
 
-        if self.head.id == patient_id:
-            self.head = self.head.next
-            self.save_data()
-            return True
+    def _fault_in(self, patient_id: str) -> Optional[Patient]:
+        """Load an archived patient into the hot set"""
+        data = self.archive.get(patient_id)
+        if data is None:
+            return None
+        patient = self._from_archive(data)
+        self._append(patient)
+        return patient
 
-        current = self.head
-        while current.next:
-            if current.next.id == patient_id:
-                current.next = current.next.next
-                self.save_data()
-                return True
-            current = current.next
-        return False
+    def _evict(self) -> bool:
+        """Archive least recently used patients once the hot set is over budget.
 
-    def update_patient(self, patient_id: str, updated_data: Dict) -> bool:
-        """Update patient information"""
+        Evicts down to 90% of the budget so the pass that unlinks them from
+        the list runs once per batch rather than once per patient. Returns
+        True if anything was evicted.
+        """
+        if len(self._index) <= self.hot_capacity:
+            return False
+        target = max(1, self.hot_capacity * 9 // 10)
+        evicted = set()
+        records = []
+        while len(self._index) > target:
+            patient_id, patient = self._index.popitem(last=False)
+            if patient_id in self._dirty or patient_id not in self.archive:
+                records.append(dict(patient.to_dict(), version=patient.version))
+            evicted.add(id(patient))
+        self.archive.put_many(records)
+        for record in records:
+            self._dirty.pop(record['id'], None)
+
+        previous = None
         current = self.head
+        self.head = None
         while current:
-            if current.id == patient_id:
-                for key, value in updated_data.items():
-                    if hasattr(current, key):
-                        setattr(current, key, value)
-                self.save_data()
-                return True
+            if id(current) not in evicted:
+                if previous:
+                    previous.next = current
+                else:
+                    self.head = current
+                previous = current
             current = current.next
-        return False
+        if previous:
+            previous.next = None
+        self.tail = previous
+        return True
+
+    @_locked
+    def remove_patient(self, patient_id: str, actor: str = '') -> bool:
+        """Remove a patient from the list"""
+        if not self._exists(patient_id):
+            return False
+        patient = self._index.get(patient_id) or self._from_archive(self.archive.get(patient_id))
+        self.archive.delete(patient_id)
+        self._dirty.pop(patient_id, None)
+
+        if patient_id in self._index:
+            del self._index[patient_id]
+            if self.head.id == patient_id:
+                self.head = self.head.next
+                if not self.head:
+                    self.tail = None
+            else:
+                current = self.head
+                while current.next:
+                    if current.next.id == patient_id:
+                        if current.next is self.tail:
+                            self.tail = current
+                        current.next = current.next.next
+                        break
+                    current = current.next
+
+        self.audit.record('patient', patient_id, 'remove', {}, actor)
+        for record in patient.medical_history:
+            self.rollups.remove(record, patient.assigned_doctor)
+        self.rollups.save_data()
+        self.save_data()
+        return True
+
+    @_locked
+    def update_patient(self, patient_id: str, updated_data: Dict, actor: str = '') -> bool:
+        """Update patient information"""
+        current = self.find_patient(patient_id)
+        if not current:
+            return False
+        new_id = updated_data.get('id', patient_id)
+        if new_id != patient_id and self._exists(new_id):
+            return False
+
+        self._audit_baseline(current)
+        old_history, old_doctor = list(current.medical_history), current.assigned_doctor
+        changes = {}
+        for key, value in updated_data.items():
+            if key in _PATIENT_FIELDS:
+                old = getattr(current, key)
+                if old != value:
+                    changes[key] = [old, value]
+                setattr(current, key, value)
+        current.version = next_version()
+        if 'medical_history' in changes or 'assigned_doctor' in changes:
+            # Records without their own doctor are counted under the assigned one
+            for record in old_history:
+                self.rollups.remove(record, old_doctor)
+            self._count_visits(current)
+            self.rollups.save_data()
+        if new_id != patient_id:
+            self._index[new_id] = self._index.pop(patient_id)
+            self.archive.delete(patient_id)
+            self._dirty.pop(patient_id, None)
+        self._dirty[new_id] = current.freeze()
+        if changes:
+            self.audit.record('patient', patient_id, 'update', changes, actor)
+        if new_id != patient_id:
+            self.audit.record('patient', new_id, 'rename', {'from': patient_id, 'state': current.to_dict()},
+                              actor)
+        self.save_data()
+        return True
+
+    def _unique_id(self, patient_id: str) -> str:
+        """Older files may repeat an ID; suffix the repeats instead of dropping them"""
+        candidate, n = patient_id, 1
+        while candidate in self._index:
+            n += 1
+            candidate = f"{patient_id}~{n}"
+        return candidate
+
+    def _audit_baseline(self, patient: Patient):
+        """Record the full state of a patient that predates the audit log"""
+        if not self.audit.has_history('patient', patient.id):
+            self.audit.record('patient', patient.id, 'baseline', patient.to_dict())
 
     def get_all_patients(self) -> List[Patient]:
-        """Get all patients in the list"""
-        patients = []
+        """Get all patients, hot ones first.
+
+        Archived patients are decoded for the caller but not added to the hot
+        set, so change them through update_patient rather than in place.
+        """
+        return list(self.iter_patients())
+
+    def patient_count(self) -> int:
+        """Number of patients, hot and archived, without decoding any"""
+        return len(self._index) + sum(1 for patient_id in self.archive.ids()
+                                      if patient_id not in self._index)
+
+    def iter_patients(self) -> Iterator[Patient]:
+        """Stream every patient without holding the whole archive in memory"""
         current = self.head
         while current:
-            patients.append(current)
+            yield current
             current = current.next
-        return patients
+        for data in self.archive.iter_records(exclude=self._index):
+            yield self._from_archive(data)
 
+    @_locked
     def find_patient(self, patient_id: str) -> Optional[Patient]:
         """Find a patient by ID"""
-        current = self.head
-        while current:
-            if current.id == patient_id:
-                return current
-            current = current.next
+        patient = self._index.get(patient_id)
+        if patient is not None:
+            self._index.move_to_end(patient_id)
+            return patient
+        if patient_id in self.archive:
+            patient = self._fault_in(patient_id)
+            self._evict()
+            return patient
         return None
 
+    def has_patient(self, patient_id: str) -> bool:
+        """Check whether a patient ID is taken without loading an archived record"""
+        return self._exists(patient_id)
+
+    @_locked
     def search_patients(self, search_term: str) -> List[Patient]:
-        """Search patients by various criteria"""
+        """Search patients by various criteria.
+
+        Archived matches are decoded for the caller but, as in iter_patients,
+        not added to the hot set, so a broad search cannot push the hot set
+        past its budget. Change them through update_patient.
+        """
         results = []
         current = self.head
         search_term = search_term.lower()
         
         while current:
             # Search in multiple fields
-            if (search_term in current.name.lower() or
-                search_term in current.id.lower() or
-                search_term in current.contact.lower() or
-                search_term in str(current.age) or
-                search_term in current.assigned_doctor.lower()):
+            if _matches(search_term, current.name, current.id, current.contact,
+                        current.age, current.assigned_doctor):
+                self._index.move_to_end(current.id)
                 results.append(current)
             current = current.next
+
+        for data in self.archive.iter_records(exclude=self._index):
+            if _matches(search_term, data['name'], data['id'], data['contact'],
+                        data['age'], data.get('assigned_doctor', '')):
+                results.append(self._from_archive(data))
         return results
 
-    def add_medical_record(self, patient_id: str, record: Dict) -> bool:
+    @_locked
+    def add_medical_record(self, patient_id: str, record: Dict, actor: str = '') -> bool:
         """Add a medical record to a patient's history"""
         patient = self.find_patient(patient_id)
         if patient:
+            self._audit_baseline(patient)
             patient.medical_history.append(record)
+            patient.version = next_version()
+            self._dirty[patient_id] = patient.freeze()
+            self.audit.record('patient', patient_id, 'append', {'medical_history': record}, actor)
+            self.rollups.add(record, patient.assigned_doctor)
+            self.rollups.save_data()
             self.save_data()
             return True
         return False
 
     def save_data(self):
-        """Save patients data to JSON file"""
+        """Save the hot patients to JSON file; cold ones live in the archive"""
         data = []
         current = self.head
         while current:
-            patient_dict = {
-                'id': current.id,
-                'name': current.name,
-                'age': current.age,
-                'gender': current.gender,
-                'contact': current.contact,
-                'medical_history': current.medical_history,
-                'assigned_doctor': current.assigned_doctor,
-                'emergency_contact': current.emergency_contact,
-                'notes': current.notes
-            }
-            data.append(patient_dict)
+            data.append(current.to_dict())
             current = current.next
-        
+
         with open('patients.json', 'w') as f:
             json.dump(data, f)
 
+    @_locked
+    def snapshot(self) -> Snapshot:
+        """Consistent read-only view of all patients as of now.
+
+        Taking one is O(1) and reading it never blocks writers; archived
+        patients are decoded as the snapshot is iterated. Use it for reports,
+        exports and anything else that reads many patients, from the UI or
+        from a background thread.
+        """
+        return Snapshot(self._dirty.snapshot(), self.archive.snapshot_locations(),
+                        self._load_archived)
+
+    def _load_archived(self, location: int) -> FrozenPatient:
+        return FrozenPatient.from_dict(self.archive.read_at(location))
+
+    def search_snapshot(self, search_term: str) -> List[FrozenPatient]:
+        """search_patients over a snapshot. It takes no lock and leaves the
+        hot set alone, so a background thread can run it while the list keeps
+        changing."""
+        search_term = search_term.lower()
+        return [patient for patient in self.snapshot()
+                if _matches(search_term, patient.name, patient.id, patient.contact,
+                            patient.age, patient.assigned_doctor)]
+
+    @_locked
     def load_data(self):
         """Load patients data from JSON file"""
         try:
             with open('patients.json', 'r') as f:
                 data = json.load(f)
                 self.head = None  # Reset the list
+                self.tail = None
+                self._index = OrderedDict()
+                self._dirty = CopyOnWriteDict()
                 for patient_dict in data:
-                    self.add_patient(patient_dict)
+                    patient = self._make_patient(patient_dict)
+                    patient.id = self._unique_id(patient.id)
+                    self._append(patient)
+                    self._dirty[patient.id] = patient.freeze()
         except FileNotFoundError:
-            pass
\ No newline at end of file
+            pass
+
+        # Patients who visited most recently are the last to be evicted
+        for patient in sorted(self._index.values(), key=_last_visit):
+            self._index.move_to_end(patient.id)
+        if self._evict():
+            self.save_data()
+
+
+def _last_visit(patient: Patient) -> str:
+    return max((str(record.get('date', '')) for record in patient.medical_history), default='')
+
+
+def _matches(term: str, name: str, patient_id: str, contact: str, age, assigned_doctor: str) -> bool:
+    return (term in name.lower() or
+            term in patient_id.lower() or
+            term in contact.lower() or
+            term in str(age) or
+            term in assigned_doctor.lower())
@@ -0,0 +1,120 @@
+# shared/schedule.py
+from array import array
+from datetime import time
+from typing import Dict, Iterable, List, Optional, Union
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DEFAULT_HOURS = {'start': '09:00', 'end': '17:00'}
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEK_SLOTS = 7 * SLOTS_PER_DAY
+MINUTES_PER_DAY = 24 * 60
+
+
+def weekday_mask(days: Iterable[str]) -> int:
+    """Encode weekday names as a 7-bit mask, Monday = bit 0"""
+    mask = 0
+    for day in days:
+        if day in WEEKDAYS:
+            mask |= 1 << WEEKDAYS.index(day)
+    return mask
+
+
+def mask_to_weekdays(mask: int) -> List[str]:
+    return [day for i, day in enumerate(WEEKDAYS) if mask & (1 << i)]
+
+
+def to_minutes(value: Union[str, time]) -> int:
+    """Minutes since midnight for "HH:MM" strings or time objects"""
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    hours, minutes = value.split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def format_hours(working_hours: Optional[Dict]) -> str:
+    hours = working_hours or DEFAULT_HOURS
+    return f"{hours.get('start', DEFAULT_HOURS['start'])} - {hours.get('end', DEFAULT_HOURS['end'])}"
+
+
+def _iter_bits(bits: int):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class ScheduleIndex:
+    """Precomputed doctor availability.
+
+    Every doctor gets a position in the index. Their working days are kept as
+    a weekday bitmask and their hours as start/end minute arrays. For each of
+    the week's 30-minute slots the index holds one integer whose bit i is set
+    when doctor i works during that slot, plus one integer per specialization
+    with the bits of its doctors. A query is therefore a single AND of two
+    integers, which tests every doctor at once, followed by an exact minute
+    check on the few doctors left. Doctors without stored working hours are
+    assumed to keep the default 09:00 - 17:00 shift. A shift whose end is not
+    after its start runs past midnight into the next day.
+    """
+
+    def __init__(self, doctors: Iterable):
+        self.doctors = list(doctors)
+        self.day_masks = array('B')
+        self.starts = array('H')
+        self.ends = array('H')
+        self.by_specialization: Dict[str, int] = {}
+        self.slots = [0] * WEEK_SLOTS
+
+        for position, doctor in enumerate(self.doctors):
+            hours = getattr(doctor, 'working_hours', None) or DEFAULT_HOURS
+            try:
+                start = to_minutes(hours.get('start', DEFAULT_HOURS['start']))
+                end = to_minutes(hours.get('end', DEFAULT_HOURS['end']))
+            except (ValueError, AttributeError):
+                start, end = to_minutes(DEFAULT_HOURS['start']), to_minutes(DEFAULT_HOURS['end'])
+            days = weekday_mask(doctor.schedule)
+
+            self.day_masks.append(days)
+            self.starts.append(start)
+            self.ends.append(end)
+            bit = 1 << position
+            self.by_specialization[doctor.specialization] = \
+                self.by_specialization.get(doctor.specialization, 0) | bit
+
+            for day in range(7):
+                if days & (1 << day):
+                    for slot in self._slots_covered(day, start, end):
+                        self.slots[slot] |= bit
+
+    @staticmethod
+    def _slots_covered(day: int, start: int, end: int):
+        """Week slot numbers overlapped by a shift starting on ``day``"""
+        if end <= start:
+            end += MINUTES_PER_DAY
+        first = day * SLOTS_PER_DAY + start // SLOT_MINUTES
+        last = day * SLOTS_PER_DAY + (end - 1) // SLOT_MINUTES
+        for slot in range(first, last + 1):
+            yield slot % WEEK_SLOTS
+
+    def _covers(self, position: int, day: int, minute: int) -> bool:
+        start, end, days = self.starts[position], self.ends[position], self.day_masks[position]
+        if start < end:
+            return bool(days & (1 << day)) and start <= minute < end
+        previous = (day - 1) % 7
+        return (bool(days & (1 << day)) and minute >= start) or \
+            (bool(days & (1 << previous)) and minute < end)
+
+    def available(self, day: Union[int, str], at: Union[str, time],
+                  specialization: Optional[str] = None) -> List:
+        """Doctors (optionally of one specialization) on duty at a weekday and time"""
+        day = WEEKDAYS.index(day) if isinstance(day, str) else day
+        minute = to_minutes(at)
+        bits = self.slots[day * SLOTS_PER_DAY + minute // SLOT_MINUTES]
+        if specialization:
+            bits &= self.by_specialization.get(specialization, 0)
+        return [self.doctors[i] for i in _iter_bits(bits) if self._covers(i, day, minute)]
+
+    def specializations(self) -> List[str]:
+        return sorted(self.by_specialization)
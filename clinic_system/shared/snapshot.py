@@ -0,0 +1,122 @@
+# shared/snapshot.py
+import heapq
+import time
+from collections.abc import MutableMapping
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional
+
+
+class CopyOnWriteDict(MutableMapping):
+    """Dict whose snapshot() costs O(1).
+
+    snapshot() hands out a read-only proxy of the current table and marks it
+    shared; the next write copies the table first, so a proxy that was
+    handed out never changes. A table is copied at most once per snapshot,
+    and only if something is written while the snapshot is alive. The
+    owner must not call snapshot() while a write is in progress.
+    """
+
+    def __init__(self, data: Optional[Mapping] = None):
+        self._data: Dict = dict(data or {})
+        self._shared = False
+
+    def snapshot(self) -> Mapping:
+        self._shared = True
+        return MappingProxyType(self._data)
+
+    def _own(self):
+        if self._shared:
+            self._data = dict(self._data)
+            self._shared = False
+
+    def __setitem__(self, key, value):
+        self._own()
+        self._data[key] = value
+
+    def __delitem__(self, key):
+        self._own()
+        del self._data[key]
+
+    def pop(self, key, *default):
+        if key in self._data:
+            self._own()
+        return self._data.pop(key, *default)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def keys(self):
+        return self._data.keys()
+
+    def values(self):
+        return self._data.values()
+
+    def items(self):
+        return self._data.items()
+
+
+class Snapshot:
+    """Read-only, point-in-time view of a DoctorList or PatientList.
+
+    ``records`` maps IDs to frozen records. ``locations`` maps the IDs of
+    archived patients to where their record sits in the cold archive, and
+    ``load`` decodes one on demand. Archived bytes are never rewritten in
+    place, so the view stays consistent however long it is held. Later
+    writes to the list are not visible, and the view holds no lock, so it
+    can be read from any thread while writers carry on.
+    """
+
+    def __init__(self, records: Mapping[str, Any], locations: Optional[Mapping[str, int]] = None,
+                 load: Optional[Callable[[int], Any]] = None):
+        self.records = records
+        self.locations = locations if locations is not None else {}
+        self._load = load
+        self.taken_at = time.time()
+
+    def get(self, record_id: str):
+        record = self.records.get(record_id)
+        if record is None:
+            location = self.locations.get(record_id)
+            if location is not None:
+                record = self._load(location)
+        return record
+
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self.records or record_id in self.locations
+
+    def __len__(self) -> int:
+        return len(self.records) + sum(1 for record_id in self.locations
+                                       if record_id not in self.records)
+
+    def ids(self) -> Iterator[str]:
+        """Every ID in the snapshot, without decoding anything"""
+        yield from self.records
+        for record_id in self.locations:
+            if record_id not in self.records:
+                yield record_id
+
+    def page(self, after: Optional[str] = None, limit: int = 50) -> List:
+        """Up to ``limit`` records in ID order, starting after ID ``after``.
+        Only the records returned are decoded."""
+        ids = self.ids() if after is None else (record_id for record_id in self.ids()
+                                                if record_id > after)
+        return [self.get(record_id) for record_id in heapq.nsmallest(limit, ids)]
+
+    def __iter__(self) -> Iterator:
+        """Every record: in-memory ones first, then archived ones in file order"""
+        yield from self.records.values()
+        for location in sorted(location for record_id, location in self.locations.items()
+                               if record_id not in self.records):
+            yield self._load(location)
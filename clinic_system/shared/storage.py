@@ -0,0 +1,251 @@
+# shared/storage.py
+import argparse
+import gzip
+import json
+import os
+import threading
+from typing import Dict, Iterable, Iterator, Mapping, Optional
+from .filelock import hold_shared, locked, try_exclusive
+from .snapshot import CopyOnWriteDict
+
+_LENGTH_BITS = 32
+_LENGTH_MASK = (1 << _LENGTH_BITS) - 1
+
+_archives: Dict[str, 'ColdArchive'] = {}
+_archives_lock = threading.Lock()
+
+
+def get_archive(path: str = 'patients_archive') -> 'ColdArchive':
+    """Return the shared archive for a path, so every PatientList in the
+    process (one per Streamlit session, plus the API) writes through the
+    same instance"""
+    key = os.path.abspath(path)
+    with _archives_lock:
+        if key not in _archives:
+            _archives[key] = ColdArchive(path)
+        return _archives[key]
+
+
+class ColdArchive:
+    """Compressed on-disk store for patients outside the in-memory working set.
+
+    Every record is written as its own gzip member appended to
+    ``<path>.gz``, so one record can be read back by seeking to it and
+    decompressing just that member. ``<path>.idx`` is an append-only log of
+    ``[id, offset, length]`` JSON lines, where a length of 0 marks a delete;
+    the last line for an ID wins. Only a single packed integer per archived
+    patient stays in memory.
+
+    Several processes may use the same files. Writers append under an
+    exclusive lock on ``<path>.gz`` and write the data before the index
+    lines that point at it; every instance applies the index lines others
+    appended before it looks an ID up. Each open instance holds a shared
+    lock on ``<path>.lock`` for as long as it is open.
+
+    Rewriting a record leaves its old bytes behind, which is why snapshots
+    can keep reading old locations. compact() reclaims them, but only with
+    no other process attached and no snapshots in use, so it is an offline
+    step (``python -m shared.storage``). Use get_archive() rather than
+    opening a second instance in the same process. All methods are
+    thread-safe.
+    """
+
+    def __init__(self, path: str = 'patients_archive'):
+        self.data_path = path + '.gz'
+        self.index_path = path + '.idx'
+        self.locations = CopyOnWriteDict()
+        self.garbage = 0
+        self._lock = threading.RLock()
+        self._users = open(path + '.lock', 'ab')
+        hold_shared(self._users)  # waits out a compaction in progress
+        self._open()
+        self._load_index()
+
+    def _open(self):
+        self._writer = open(self.data_path, 'ab')
+        self._reader = open(self.data_path, 'rb')
+        self._index_file = open(self.index_path, 'ab')
+        self._index_reader = open(self.index_path, 'rb')
+        self._index_offset = 0  # bytes of the index applied to self.locations
+
+    def _load_index(self):
+        with locked(self._writer):
+            self._catch_up()
+            # Nobody can be mid-write while we hold the lock, so anything
+            # past the last whole line is a torn write
+            self._index_file.truncate(self._index_offset)
+
+    def _catch_up(self):
+        """Apply index lines appended since the last call, by any process"""
+        if os.fstat(self._index_reader.fileno()).st_size <= self._index_offset:
+            return
+        self._index_reader.seek(self._index_offset)
+        for line in self._index_reader:
+            if not line.endswith(b'\n'):
+                break  # still being written
+            try:
+                patient_id, position, length = json.loads(line)
+            except ValueError:
+                break
+            self._set(patient_id, position, length)
+            self._index_offset += len(line)
+
+    def _set(self, patient_id: str, position: int, length: int):
+        previous = self.locations.pop(patient_id, None)
+        if previous is not None:
+            self.garbage += previous & _LENGTH_MASK
+        if length:
+            self.locations[patient_id] = (position << _LENGTH_BITS) | length
+
+    def _append_index(self, lines: str):
+        data = lines.encode('utf-8')
+        self._index_file.write(data)
+        self._index_file.flush()
+        self._index_offset += len(data)
+
+    def __contains__(self, patient_id: str) -> bool:
+        with self._lock:
+            self._catch_up()
+            return patient_id in self.locations
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._catch_up()
+            return len(self.locations)
+
+    def ids(self) -> Iterable[str]:
+        """IDs archived right now; later writes do not change the result"""
+        return self.snapshot_locations().keys()
+
+    def snapshot_locations(self) -> Mapping[str, int]:
+        """Frozen ID -> location map for a Snapshot"""
+        with self._lock:
+            self._catch_up()
+            return self.locations.snapshot()
+
+    def put(self, record: Dict):
+        """Archive a patient record, replacing any earlier copy"""
+        self.put_many([record])
+
+    def put_many(self, records: Iterable[Dict]):
+        """Archive several records with one lock and one flush"""
+        blobs = [(record['id'], gzip.compress(json.dumps(record, separators=(',', ':')).encode(),
+                                              compresslevel=6))
+                 for record in records]
+        if not blobs:
+            return
+        with self._lock, locked(self._writer):
+            self._catch_up()
+            # The real end of the file, not a position remembered from earlier
+            position = self._writer.seek(0, os.SEEK_END)
+            lines = []
+            for patient_id, blob in blobs:
+                self._writer.write(blob)
+                self._set(patient_id, position, len(blob))
+                lines.append(json.dumps([patient_id, position, len(blob)]) + '\n')
+                position += len(blob)
+            # The data must be on disk before any index line points at it
+            self._writer.flush()
+            self._append_index(''.join(lines))
+
+    def get(self, patient_id: str) -> Optional[Dict]:
+        with self._lock:
+            self._catch_up()
+            location = self.locations.get(patient_id)
+        if location is None:
+            return None
+        return self.read_at(location)
+
+    def read_at(self, location: int) -> Dict:
+        """Decode the record at a location; safe to call from any thread"""
+        with self._lock:
+            self._reader.seek(location >> _LENGTH_BITS)
+            blob = self._reader.read(location & _LENGTH_MASK)
+        return json.loads(gzip.decompress(blob))
+
+    def delete(self, patient_id: str):
+        with self._lock, locked(self._writer):
+            self._catch_up()
+            if patient_id in self.locations:
+                self._set(patient_id, 0, 0)
+                self._append_index(json.dumps([patient_id, 0, 0]) + '\n')
+
+    def iter_records(self, exclude=()) -> Iterator[Dict]:
+        """Stream archived records in file order, skipping IDs in ``exclude``.
+        The set of records is fixed when iteration starts."""
+        locations = self.snapshot_locations()
+        for location in sorted(location for patient_id, location in locations.items()
+                               if patient_id not in exclude):
+            yield self.read_at(location)
+
+    def live_bytes(self) -> int:
+        return sum(location & _LENGTH_MASK for location in self.snapshot_locations().values())
+
+    def compact(self):
+        """Rewrite the archive without superseded and deleted records.
+
+        The files are replaced, so this refuses to run while another process
+        has the archive open, and it must not run while snapshots of this
+        archive are in use.
+        """
+        with self._lock:
+            if not try_exclusive(self._users):
+                raise RuntimeError(f'{self.data_path} is open in another process')
+            try:
+                self._catch_up()
+                self._compact()
+            finally:
+                hold_shared(self._users)
+
+    def _compact(self):
+        self._close_files()
+        data_tmp, index_tmp = self.data_path + '.tmp', self.index_path + '.tmp'
+        locations = {}
+        with open(self.data_path, 'rb') as source, open(data_tmp, 'wb') as data, \
+                open(index_tmp, 'w', encoding='utf-8') as index:
+            for patient_id, location in sorted(self.locations.items(), key=lambda item: item[1]):
+                source.seek(location >> _LENGTH_BITS)
+                blob = source.read(location & _LENGTH_MASK)
+                position = data.tell()
+                data.write(blob)
+                index.write(json.dumps([patient_id, position, len(blob)]) + '\n')
+                locations[patient_id] = (position << _LENGTH_BITS) | len(blob)
+        os.replace(data_tmp, self.data_path)
+        os.replace(index_tmp, self.index_path)
+        self.locations = CopyOnWriteDict(locations)
+        self.garbage = 0
+        self._open()
+        self._index_offset = os.path.getsize(self.index_path)
+
+    def _close_files(self):
+        self._writer.close()
+        self._reader.close()
+        self._index_file.close()
+        self._index_reader.close()
+
+    def close(self):
+        with self._lock:
+            self._close_files()
+            self._users.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compact the patient archive. Stop the Streamlit app and the API first.')
+    parser.add_argument('path', nargs='?', default='patients_archive',
+                        help='Archive path without the .gz/.idx suffix')
+    args = parser.parse_args()
+
+    archive = ColdArchive(args.path)
+    garbage = archive.garbage
+    try:
+        archive.compact()
+    except RuntimeError as e:
+        parser.exit(1, f'{e}; stop it and try again\n')
+    finally:
+        archive.close()
+    print(f'Reclaimed {garbage} bytes; {archive.data_path} now holds {len(archive.locations)} patients')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# shared/styles.py
+import re
+from functools import lru_cache
+import streamlit as st
+
+# One stylesheet for every page; class names do not overlap between pages
+SITE_CSS = """
+    /* Home */
+    .big-title {
+        font-size: 3rem !important;
+        color: #1f77b4;
+        text-align: center;
+        padding: 2rem 0;
+    }
+    .card {
+        border-radius: 10px;
+        padding: 1.5rem;
+        background-color: #f8f9fa;
+        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+        margin-bottom: 1rem;
+    }
+    .stat-number {
+        font-size: 2rem;
+        font-weight: bold;
+        color: #1f77b4;
+    }
+    .welcome-text {
+        font-size: 1.2rem;
+        color: #666;
+        text-align: center;
+        margin-bottom: 2rem;
+    }
+    .feature-section {
+        margin-top: 2rem;
+        padding: 1rem;
+        border-radius: 5px;
+    }
+
+    /* Admin Dashboard */
+    .doctor-form {
+        background-color: #f8f9fa;
+        padding: 20px;
+        border-radius: 10px;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    }
+    .success-message {
+        color: #28a745;
+        padding: 10px;
+        border-radius: 5px;
+        margin: 10px 0;
+    }
+    .error-message {
+        color: #dc3545;
+        padding: 10px;
+        border-radius: 5px;
+        margin: 10px 0;
+    }
+
+    /* Patient Management */
+    .patient-card {
+        background-color: #ffffff;
+        padding: 1.5rem;
+        border-radius: 10px;
+        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+        margin-bottom: 1rem;
+    }
+    .search-box {
+        background-color: #f8f9fa;
+        padding: 1.5rem;
+        border-radius: 10px;
+        margin-bottom: 2rem;
+    }
+    .medical-history {
+        background-color: #e9ecef;
+        padding: 1rem;
+        border-radius: 5px;
+        margin-top: 1rem;
+    }
+"""
+
+_COMMENTS = re.compile(r'/\*.*?\*/', re.S)
+_SPACE_AROUND = re.compile(r'\s*([{}:;,])\s*')
+
+
+@lru_cache(maxsize=None)
+def stylesheet() -> str:
+    """The site stylesheet as one minified <style> tag, built once per process"""
+    css = _SPACE_AROUND.sub(r'\1', _COMMENTS.sub('', SITE_CSS)).replace(';}', '}')
+    return f"<style>{' '.join(css.split())}</style>"
+
+
+def inject_styles():
+    """Add the site stylesheet to the page.
+
+    Streamlit clears any element that a rerun does not emit again, so the
+    tag has to be sent on every run. Every page sends the same small tag as
+    its first element, so the browser keeps the existing node across reruns
+    and page switches instead of re-parsing the styles.
+    """
+    st.markdown(stylesheet(), unsafe_allow_html=True)
@@ -0,0 +1,316 @@
+# shared/validation.py
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .schedule import WEEKDAYS
+
+DEFAULT_COUNTRY_CODE = '20'  # used for numbers written with a national trunk 0
+GENDERS = {'male': 'Male', 'female': 'Female', 'other': 'Other'}
+MAX_NAME_LENGTH = 100
+MAX_TEXT_LENGTH = 1000
+
+# Compiled once at import; every check below reuses them
+_PHONE_SEPARATORS = re.compile(r'[\s\-().]')
+_E164 = re.compile(r'\+[1-9]\d{7,14}')
+_RECORD_ID = re.compile(r'[A-Za-z0-9][A-Za-z0-9_.~\-]{0,63}')
+_NAME = re.compile(r"[^\W\d_]+(?:[ .'\-]+[^\W\d_]*)*")
+_SPACES = re.compile(r'\s+')
+_ISO_DATE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+_HOUR_MINUTE = re.compile(r'([01]\d|2[0-3]):([0-5]\d)')
+
+Errors = Dict[str, str]
+_MISSING = object()  # a key that is absent, as opposed to present and None
+
+
+def normalize_phone(raw, country_code: str = DEFAULT_COUNTRY_CODE) -> Optional[str]:
+    """E.164 form of a phone number (e.g. 010 1234 5678 -> +201012345678),
+    or None if it cannot be one"""
+    if not isinstance(raw, str):
+        return None
+    # Already E.164 and digits only: the common case, checked without regexes
+    if raw[:1] == '+' and raw[1:2] != '0' and raw[1:].isdigit() and raw.isascii() \
+            and 9 <= len(raw) <= 16:
+        return raw
+    number = _PHONE_SEPARATORS.sub('', raw)
+    if number.startswith('+'):
+        pass
+    elif number.startswith('00'):
+        number = '+' + number[2:]
+    elif number.startswith('0'):
+        number = '+' + country_code + number[1:]
+    else:
+        number = '+' + number
+    return number if _E164.fullmatch(number) else None
+
+
+def normalize_name(raw) -> Optional[str]:
+    if not isinstance(raw, str):
+        return None
+    if len(raw) <= MAX_NAME_LENGTH and '  ' not in raw and raw[-1:] != ' ' and _NAME.fullmatch(raw):
+        return raw  # nothing to collapse or strip
+    name = _SPACES.sub(' ', raw).strip()
+    if not name or len(name) > MAX_NAME_LENGTH or not _NAME.fullmatch(name):
+        return None
+    return name
+
+
+def normalize_age(raw) -> Optional[int]:
+    if type(raw) is int:  # not isinstance: True is not an age
+        age = raw
+    elif isinstance(raw, str) and raw.strip().isdigit():
+        age = int(raw)
+    elif isinstance(raw, float) and raw.is_integer():
+        age = int(raw)
+    else:
+        return None
+    return age if 0 <= age <= 150 else None
+
+
+def normalize_id(raw) -> Optional[str]:
+    if not isinstance(raw, str):
+        return None
+    if raw.isalnum() and raw.isascii() and len(raw) <= 64:
+        return raw
+    record_id = raw.strip()
+    return record_id if _RECORD_ID.fullmatch(record_id) else None
+
+
+def _text(raw, limit: int = MAX_TEXT_LENGTH) -> Optional[str]:
+    if isinstance(raw, str):
+        return raw.strip() if len(raw) <= limit else None
+    return '' if raw is None else None
+
+
+def _date(raw) -> Optional[str]:
+    if not isinstance(raw, str):
+        return None
+    match = _ISO_DATE.fullmatch(raw.strip()[:10])
+    if not match:
+        return None
+    try:
+        return date(int(match[1]), int(match[2]), int(match[3])).isoformat()
+    except ValueError:
+        return None
+
+
+def validate_medical_record(data) -> Tuple[Dict, Errors]:
+    """Normalized record and field errors for {date, diagnosis, prescription}.
+    A record that is already normalized comes back as the same dict."""
+    if not isinstance(data, dict):
+        return {}, {'record': 'must be an object'}
+    errors, changes = {}, {}
+
+    day = _date(data.get('date'))
+    if day is None:
+        errors['date'] = 'must be a date as YYYY-MM-DD'
+    elif day != data['date']:
+        changes['date'] = day
+
+    diagnosis = _text(data.get('diagnosis'))
+    if not diagnosis:
+        errors['diagnosis'] = ('is required' if diagnosis == ''
+                               else f'must be text up to {MAX_TEXT_LENGTH} characters')
+    elif diagnosis is not data['diagnosis']:
+        changes['diagnosis'] = diagnosis
+
+    prescription = _text(data.get('prescription'))
+    if prescription is None:
+        errors['prescription'] = f'must be text up to {MAX_TEXT_LENGTH} characters'
+    elif prescription is not data.get('prescription'):
+        changes['prescription'] = prescription
+    return (dict(data, **changes) if changes else data), errors
+
+
+def validate_patient(data, partial: bool = False) -> Tuple[Dict, Errors]:
+    """Normalized patient and field errors.
+
+    With ``partial`` only the fields present are checked, for updates.
+    Emergency contact and notes are free text; medical history entries are
+    checked as medical records. Keys that are not patient fields are left
+    out of the result. The normalizers hand back their input when it is
+    already normal, so a clean row is returned as the same dict, uncopied.
+    """
+    if not isinstance(data, dict):
+        return {}, {'patient': 'must be an object'}
+    errors, changes = {}, {}
+
+    for key, normalize, message in _PATIENT_RULES:
+        raw = data.get(key, _MISSING)
+        if raw is _MISSING:
+            if not partial:
+                errors[key] = 'is required'
+            continue
+        value = normalize(raw)
+        if value is None:
+            errors[key] = message
+        elif value is not raw:
+            changes[key] = value
+
+    for key in ('assigned_doctor', 'emergency_contact', 'notes'):
+        raw = data.get(key, _MISSING)
+        if raw is not _MISSING:
+            value = _text(raw)
+            if value is None:
+                errors[key] = f'must be text up to {MAX_TEXT_LENGTH} characters'
+            elif value is not raw:
+                changes[key] = value
+
+    if 'medical_history' in data:
+        history = data['medical_history']
+        if not isinstance(history, list):
+            errors['medical_history'] = 'must be a list'
+        else:
+            records = []
+            for position, entry in enumerate(history):
+                record, record_errors = validate_medical_record(entry)
+                for key, message in record_errors.items():
+                    errors[f'medical_history[{position}].{key}'] = message
+                records.append(record)
+            if any(record is not entry for record, entry in zip(records, history)):
+                changes['medical_history'] = records
+
+    if not changes and data.keys() <= PATIENT_FIELDS:
+        return data, errors
+    patient = {key: value for key, value in data.items() if key in PATIENT_FIELDS}
+    patient.update(changes)
+    return patient, errors
+
+
+def _gender(raw) -> Optional[str]:
+    if not isinstance(raw, str):
+        return None
+    return raw if raw in _GENDER_NAMES else GENDERS.get(raw.strip().lower())
+
+
+_PATIENT_RULES = (
+    ('id', normalize_id, 'must be 1-64 letters, digits, or . _ - ~'),
+    ('name', normalize_name, 'must be letters, spaces, and . \' -'),
+    ('age', normalize_age, 'must be a whole number from 0 to 150'),
+    ('gender', _gender, 'must be Male, Female or Other'),
+    ('contact', normalize_phone, 'must be a valid phone number'),
+)
+_GENDER_NAMES = frozenset(GENDERS.values())
+PATIENT_FIELDS = frozenset([key for key, _, _ in _PATIENT_RULES] +
+                           ['assigned_doctor', 'emergency_contact', 'notes', 'medical_history'])
+
+
+def _schedule(raw) -> Optional[List[str]]:
+    if not isinstance(raw, list) or not raw or any(day not in WEEKDAYS for day in raw):
+        return None
+    return [day for day in WEEKDAYS if day in raw]
+
+
+def _specialization(raw) -> Optional[str]:
+    value = _text(raw, MAX_NAME_LENGTH)
+    return value or None
+
+
+_DOCTOR_RULES = (
+    ('id', normalize_id, 'must be 1-64 letters, digits, or . _ - ~'),
+    ('name', normalize_name, 'must be letters, spaces, and . \' -'),
+    ('specialization', _specialization, 'is required'),
+    ('contact', normalize_phone, 'must be a valid phone number'),
+    ('schedule', _schedule, 'must list at least one weekday'),
+)
+DOCTOR_FIELDS = frozenset([key for key, _, _ in _DOCTOR_RULES] + ['emergency_contact', 'working_hours'])
+
+
+def validate_doctor(data, partial: bool = False) -> Tuple[Dict, Errors]:
+    """Normalized doctor and field errors; see validate_patient"""
+    if not isinstance(data, dict):
+        return {}, {'doctor': 'must be an object'}
+    errors = {}
+    doctor = {key: value for key, value in data.items() if key in DOCTOR_FIELDS}
+
+    for key, normalize, message in _DOCTOR_RULES:
+        if key not in data:
+            if not partial:
+                errors[key] = 'is required'
+            continue
+        value = normalize(data[key])
+        if value is None:
+            errors[key] = message
+        else:
+            doctor[key] = value
+
+    if data.get('emergency_contact'):
+        phone = normalize_phone(data['emergency_contact'])
+        if phone is None:
+            errors['emergency_contact'] = 'must be a valid phone number'
+        else:
+            doctor['emergency_contact'] = phone
+
+    if 'working_hours' in data:
+        hours = data['working_hours']
+        if not isinstance(hours, dict) or not all(
+                isinstance(hours.get(key), str) and _HOUR_MINUTE.fullmatch(hours[key])
+                for key in ('start', 'end')):
+            errors['working_hours'] = 'must have start and end as HH:MM'
+    return doctor, errors
+
+
+@dataclass
+class BatchReport:
+    """Outcome of validating many records in one pass"""
+    valid: List[Dict] = field(default_factory=list)
+    valid_rows: List[int] = field(default_factory=list)
+    errors: Dict[int, Errors] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def summary(self) -> List[Tuple[str, int]]:
+        """How many rows failed each check, most common first"""
+        counts = Counter(f'{key} {message}' if not key.startswith('medical_history[')
+                         else f"medical_history.{key.split('.', 1)[1]} {message}"
+                         for row in self.errors.values() for key, message in row.items())
+        return counts.most_common()
+
+
+_VALIDATORS = {
+    'patient': validate_patient,
+    'doctor': validate_doctor,
+    'medical_record': validate_medical_record,
+}
+
+
+def validate_batch(records: Iterable, kind: str = 'patient') -> BatchReport:
+    """Validate a batch of patients, doctors or medical records.
+
+    Valid rows come back normalized; failing rows are reported by position
+    with their field errors, and summary() aggregates them across the batch.
+    Rows that repeat an ID already seen in the batch, or that carry keys
+    which are not fields of the kind, are rejected too.
+    """
+    validate = _VALIDATORS[kind]
+    report = BatchReport()
+    seen_ids = set()
+    for row, data in enumerate(records):
+        value, errors = validate(data)
+        if kind != 'medical_record' and value is not data and isinstance(data, dict):
+            errors.update(unknown_fields(data, value))
+        record_id = value.get('id') if kind != 'medical_record' else None
+        if record_id is not None and 'id' not in errors:
+            if record_id in seen_ids:
+                errors['id'] = 'is repeated in this batch'
+            seen_ids.add(record_id)
+        if errors:
+            report.errors[row] = errors
+        else:
+            report.valid.append(value)
+            report.valid_rows.append(row)
+    return report
+
+
+def unknown_fields(data: Dict, value: Dict) -> Errors:
+    """Errors for the keys of ``data`` that a validator left out of ``value``"""
+    return {key: 'is not a known field' for key in data if key not in value}
+
+
+def format_errors(errors: Errors) -> List[str]:
+    """Human-readable messages for a form"""
+    return [f"{key.replace('_', ' ').capitalize()} {message}" for key, message in errors.items()]
@@ -0,0 +1,15 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Run the test in an empty directory, since the lists read and write
+    their files relative to the working directory"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
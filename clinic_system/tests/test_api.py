@@ -0,0 +1,120 @@
+# tests/test_api.py
+import json
+
+import pytest
+
+from api import ClinicAPI
+from shared.models import DoctorList, PatientList
+
+PATIENT = {'id': 'P1', 'name': 'Ann Lee', 'age': 40, 'gender': 'Female', 'contact': '+201012345678'}
+DOCTOR = {'id': 'D1', 'name': 'Sam Roe', 'specialization': 'GP', 'contact': '+201012345679',
+          'schedule': ['Monday']}
+
+
+@pytest.fixture
+def api(data_dir):
+    return ClinicAPI(DoctorList(), PatientList())
+
+
+def call(api, method, target, body=None, headers=None):
+    status, data, extra = api.dispatch(method, target, headers or {}, body)
+    return status, json.loads(data) if data else None, extra
+
+
+def test_update_rejects_keys_that_are_not_fields(api):
+    assert call(api, 'POST', '/patients', PATIENT)[0] == 201
+    assert call(api, 'POST', '/doctors', DOCTOR)[0] == 201
+
+    status, payload, _ = call(api, 'PUT', '/patients/P1', {'to_dict': 1})
+    assert status == 400
+    assert payload['fields'] == {'to_dict': 'is not a known field'}
+    assert call(api, 'PUT', '/doctors/D1', {'freeze': 'x'})[0] == 400
+
+    # Nothing was broken for later writes
+    assert call(api, 'PUT', '/patients/P1', {'notes': 'ok'})[0] == 200
+    assert call(api, 'POST', '/patients', dict(PATIENT, id='P2'))[0] == 201
+    assert call(api, 'PUT', '/doctors/D1', {'contact': '+201012345670'})[0] == 200
+
+
+def test_create_and_bulk_reject_unknown_keys(api):
+    assert call(api, 'POST', '/patients', dict(PATIENT, version=5))[0] == 400
+    status, payload, _ = call(api, 'POST', '/patients/bulk', [dict(PATIENT, next='x'), dict(PATIENT, id='P2')])
+    assert [row['status'] for row in payload['results']] == [400, 201]
+
+
+def test_list_update_ignores_methods_and_internal_fields(api):
+    patients = api.patient_list
+    patients.add_patient(PATIENT)
+    patients.update_patient('P1', {'to_dict': 1, 'version': 0, 'next': None, 'notes': 'kept'})
+    patient = patients.find_patient('P1')
+    assert patient.to_dict()['notes'] == 'kept'
+    assert patient.version != 0
+
+
+def test_search_runs_off_the_event_loop_over_hot_and_archived_patients(data_dir):
+    patients = PatientList(hot_capacity=10)
+    patients.add_patients([dict(PATIENT, id=f'P{n:03d}', name=f'Patient {n}') for n in range(30)])
+    api = ClinicAPI(DoctorList(), patients)
+    assert api.runs_in_background('GET', '/patients/search?q=x')
+    hot = list(patients._index)
+
+    status, payload, _ = call(api, 'GET', '/patients/search?q=Patient 2&limit=5')
+    assert status == 200
+    assert [item['id'] for item in payload['items']] == ['P002', 'P020', 'P021', 'P022', 'P023']
+    assert payload['total'] == 11
+    assert list(patients._index) == hot  # searching did not reorder or fill the hot set
+
+
+def page_ids(api, target):
+    status, payload, _ = call(api, 'GET', target)
+    assert status == 200
+    return [item['id'] for item in payload['items']], payload['next_cursor']
+
+
+def test_keyset_pages_neither_skip_nor_repeat_while_the_list_changes(data_dir):
+    patients = PatientList(hot_capacity=2)  # most pages come from the archive
+    patients.add_patients([dict(PATIENT, id=patient_id) for patient_id in 'ABCDE'])
+    assert len(patients.archive) >= 3
+    api = ClinicAPI(DoctorList(), patients)
+
+    ids, cursor = page_ids(api, '/patients?limit=2')
+    assert ids == ['A', 'B']
+    patients.add_patient(dict(PATIENT, id='AA'))  # before the cursor: not seen
+    patients.add_patient(dict(PATIENT, id='BB'))  # after it: next in line
+    patients.remove_patient('C')
+
+    ids, cursor = page_ids(api, f'/patients?limit=2&cursor={cursor}')
+    assert ids == ['BB', 'D']
+    ids, cursor = page_ids(api, f'/patients?limit=2&cursor={cursor}')
+    assert ids == ['E'] and cursor is None
+
+
+def test_bad_cursor_and_limit_are_400s(api):
+    assert call(api, 'GET', '/patients?cursor=not-a-cursor')[0] == 400
+    assert call(api, 'GET', '/patients?limit=ten')[0] == 400
+
+
+def test_if_none_match_returns_304_until_the_record_changes(api):
+    call(api, 'POST', '/patients', PATIENT)
+    status, _, extra = call(api, 'GET', '/patients/P1')
+    etag = extra['ETag']
+    assert status == 200
+
+    status, payload, extra = call(api, 'GET', '/patients/P1', headers={'if-none-match': etag})
+    assert (status, payload, extra['ETag']) == (304, None, etag)
+
+    call(api, 'PUT', '/patients/P1', {'notes': 'changed'})
+    status, payload, extra = call(api, 'GET', '/patients/P1', headers={'if-none-match': etag})
+    assert status == 200 and payload['notes'] == 'changed'
+    assert extra['ETag'] != etag
+
+
+def test_if_match_rejects_writes_against_a_stale_copy(api):
+    call(api, 'POST', '/patients', PATIENT)
+    etag = call(api, 'GET', '/patients/P1')[2]['ETag']
+    assert call(api, 'PUT', '/patients/P1', {'notes': 'first'}, {'if-match': etag})[0] == 200
+
+    status, payload, _ = call(api, 'PUT', '/patients/P1', {'notes': 'second'}, {'if-match': etag})
+    assert status == 412
+    assert call(api, 'GET', '/patients/P1')[1]['notes'] == 'first'
+    assert call(api, 'PUT', '/patients/P1', {'notes': 'second'}, {'if-match': '*'})[0] == 200
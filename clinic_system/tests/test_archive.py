@@ -0,0 +1,134 @@
+# tests/test_archive.py
+import pytest
+
+from shared.models import PatientList
+from shared.storage import ColdArchive
+
+
+def make_patients(count, start=0):
+    return [{
+        'id': f'P{n:03d}',
+        'name': f'Patient {n}',
+        'age': 30 + n % 50,
+        'gender': 'Female',
+        'contact': f'+2010{n:08d}',
+        'medical_history': [{'date': '2024-01-01', 'diagnosis': 'flu', 'prescription': 'rest'}],
+        'assigned_doctor': '',
+        'emergency_contact': '',
+        'notes': '',
+    } for n in range(start, start + count)]
+
+
+def test_evicted_patient_faults_back_in_unchanged(data_dir):
+    patients = PatientList(hot_capacity=10)
+    patients.add_patients(make_patients(30))
+    assert 'P000' not in patients._index
+    assert 'P000' in patients.archive
+
+    patient = patients.find_patient('P000')
+    assert patient.to_dict() == make_patients(1)[0]
+    assert 'P000' in patients._index
+    assert len(patients._index) <= patients.hot_capacity
+
+
+def test_update_survives_evict_and_fault_in(data_dir):
+    patients = PatientList(hot_capacity=10)
+    patients.add_patients(make_patients(30))
+    patients.update_patient('P000', {'notes': 'allergic to penicillin'})
+    version = patients.find_patient('P000').version
+
+    for n in range(1, 30):
+        patients.find_patient(f'P{n:03d}')
+    assert 'P000' not in patients._index
+
+    patient = patients.find_patient('P000')
+    assert patient.notes == 'allergic to penicillin'
+    assert patient.version == version
+
+
+def test_snapshot_versions_stable_across_decodes(data_dir):
+    patients = PatientList(hot_capacity=10)
+    patients.add_patients(make_patients(30))
+    snapshot = patients.snapshot()
+
+    first = {patient.id: patient.version for patient in snapshot}
+    second = {patient.id: patient.version for patient in snapshot}
+    assert len(first) == 30
+    assert first == second
+    assert len(set(first.values())) == 30
+
+
+def test_second_instance_sees_the_same_archive(data_dir):
+    first = PatientList(hot_capacity=10)
+    first.add_patients(make_patients(30))
+    second = PatientList(hot_capacity=10)
+    assert second.archive is first.archive
+
+    # Changes reach the other instance once the writer archives them
+    first.update_patient('P005', {'name': 'Renamed Patient'})
+    first.add_patients(make_patients(30, start=30))
+    assert 'P005' not in first._index
+    assert second.find_patient('P005').name == 'Renamed Patient'
+    assert second.find_patient('P035').name == 'Patient 35'
+
+    first.remove_patient('P010')
+    assert second.find_patient('P010') is None
+
+
+def test_search_above_capacity_keeps_hot_set_bounded(data_dir):
+    patients = PatientList(hot_capacity=10)
+    patients.add_patients(make_patients(50))
+
+    results = patients.search_patients('patient')
+    assert sorted(patient.id for patient in results) == [f'P{n:03d}' for n in range(50)]
+    assert len(patients._index) <= patients.hot_capacity
+
+
+def test_search_results_round_trip_through_update(data_dir):
+    patients = PatientList(hot_capacity=10)
+    patients.add_patients(make_patients(50))
+    archived = next(patient for patient in patients.search_patients('Patient 0')
+                    if patient.id not in patients._index)
+
+    assert patients.update_patient(archived.id, {'age': 99})
+    assert patients.find_patient(archived.id).age == 99
+    assert len(patients._index) <= patients.hot_capacity
+
+
+def test_two_archives_on_one_path_see_each_others_writes(data_dir):
+    first, second = ColdArchive('shared'), ColdArchive('shared')
+    first.put({'id': 'P1', 'name': 'One'})
+    second.put({'id': 'P2', 'name': 'Two'})
+    first.put({'id': 'P1', 'name': 'One again'})
+    second.delete('P1')
+
+    assert first.get('P2') == {'id': 'P2', 'name': 'Two'}
+    assert 'P1' not in first
+    first.put({'id': 'P3', 'name': 'Three'})
+    assert second.get('P3') == {'id': 'P3', 'name': 'Three'}
+    first.close()
+    second.close()
+
+    reopened = ColdArchive('shared')
+    assert sorted(reopened.ids()) == ['P2', 'P3']
+    assert reopened.get('P2')['name'] == 'Two'
+
+
+def test_compact_refuses_while_another_instance_is_open(data_dir):
+    first, second = ColdArchive('shared'), ColdArchive('shared')
+    for n in range(5):
+        first.put({'id': 'P1', 'name': f'Version {n}'})
+    with pytest.raises(RuntimeError):
+        second.compact()
+    second.put({'id': 'P2', 'name': 'Two'})
+    second.close()
+
+    first.compact()
+    assert first.garbage == 0
+    assert first.get('P1')['name'] == 'Version 4'
+    assert first.get('P2')['name'] == 'Two'
+    first.put({'id': 'P3', 'name': 'Three'})
+    first.close()
+
+    reopened = ColdArchive('shared')
+    assert sorted(reopened.ids()) == ['P1', 'P2', 'P3']
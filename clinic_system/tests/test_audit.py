@@ -0,0 +1,146 @@
+# tests/test_audit.py
+from datetime import datetime
+
+import pytest
+
+from shared import audit
+from shared.audit import AuditLog
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A wall clock the test moves by hand"""
+    now = [1000.0]
+    monkeypatch.setattr(audit.time, 'time', lambda: now[0])
+    return now
+
+
+def test_two_logs_on_one_file_keep_their_entries_apart(data_dir, clock):
+    ui, api = AuditLog('audit.jsonl'), AuditLog('audit.jsonl')
+    ui.record('patient', 'P1', 'create', {'id': 'P1', 'name': 'Ann'})
+    clock[0] += 1
+    api.record('patient', 'P2', 'create', {'id': 'P2', 'name': 'Bob'})
+    clock[0] += 1
+    ui.record('patient', 'P1', 'update', {'name': ['Ann', 'Anne']})
+
+    for log in (ui, api):
+        assert log.state_at('patient', 'P1', clock[0])['name'] == 'Anne'
+        assert log.state_at('patient', 'P2', clock[0])['name'] == 'Bob'
+        assert [entry['op'] for entry in log.history('patient', 'P1')] == ['create', 'update']
+        assert [entry['id'] for entry in log.changes_between(0, clock[0])] == ['P1', 'P2', 'P1']
+
+    reopened = AuditLog('audit.jsonl')
+    assert [entry['id'] for entry in reopened.history('patient', 'P2')] == ['P2']
+
+
+def test_reopening_loads_the_sidecar_index(data_dir, clock):
+    log = AuditLog('audit.jsonl')
+    log.record('patient', 'P1', 'create', {'id': 'P1', 'name': 'Ann'})
+    clock[0] += 1
+    log.record('patient', 'P1', 'update', {'id': ['P1', 'P2']})
+    log.record('patient', 'P2', 'rename', {'from': 'P1', 'state': {'id': 'P2', 'name': 'Ann'}})
+    log.close()
+
+    reopened = AuditLog('audit.jsonl')
+    assert list(reopened.offsets) == list(log.offsets)
+    assert reopened.renames == log.renames
+    assert [entry['op'] for entry in reopened.history('patient', 'P2')] == ['create', 'update', 'rename']
+
+
+@pytest.mark.parametrize('damage', ['missing', 'stale', 'behind'])
+def test_a_missing_or_stale_sidecar_is_rebuilt_from_the_log(data_dir, clock, damage):
+    log = AuditLog('audit.jsonl')
+    for i in range(3):
+        log.record('patient', f'P{i}', 'create', {'id': f'P{i}', 'name': 'Ann'})
+        clock[0] += 1
+    log.close()
+    with open('audit.jsonl.idx', 'rb') as f:
+        lines = f.readlines()
+    if damage == 'missing':
+        lines = []
+    elif damage == 'stale':
+        lines = [b'[1.0,999999,"patient","P9"]\n']
+    else:
+        lines = lines[:1] + [lines[1][:5]]  # lost the last line, tore the one before
+    with open('audit.jsonl.idx', 'wb') as f:
+        f.writelines(lines)
+
+    reopened = AuditLog('audit.jsonl')
+    assert list(reopened.offsets) == list(log.offsets)
+    assert [entry['id'] for entry in reopened.changes_between(0, clock[0])] == ['P0', 'P1', 'P2']
+    assert not reopened.has_history('patient', 'P9')
+    with open('audit.jsonl.idx', 'rb') as f:
+        assert len(f.readlines()) == 3
+
+
+def rename(log, kind, old, new, state):
+    """Record an ID change the way the lists do"""
+    log.record(kind, old, 'update', {'id': [old, new]})
+    log.record(kind, new, 'rename', {'from': old, 'state': dict(state, id=new)})
+
+
+@pytest.fixture
+def renamed(data_dir, clock):
+    """P1 is created, edited, renamed to P2, edited, then renamed back to P1.
+    Returns the time of each step."""
+    log = AuditLog('audit.jsonl')
+    times = {}
+    log.record('patient', 'P1', 'create', {'id': 'P1', 'name': 'Ann', 'medical_history': []})
+    times['created'] = clock[0]
+    clock[0] += 10
+    log.record('patient', 'P1', 'update', {'name': ['Ann', 'Anne']})
+    log.record('doctor', 'D1', 'create', {'id': 'D1', 'name': 'Sam'})
+    times['edited'] = clock[0]
+    clock[0] += 10
+    rename(log, 'patient', 'P1', 'P2', {'name': 'Anne', 'medical_history': []})
+    times['renamed'] = clock[0]
+    clock[0] += 10
+    log.record('patient', 'P2', 'append', {'medical_history': {'date': '2024-01-01', 'diagnosis': 'flu'}})
+    times['appended'] = clock[0]
+    clock[0] += 10
+    rename(log, 'patient', 'P2', 'P1', {'name': 'Anne', 'medical_history': [{'date': '2024-01-01',
+                                                                             'diagnosis': 'flu'}]})
+    times['renamed back'] = clock[0]
+    return log, times
+
+
+def test_history_follows_renames_back_and_forth(renamed):
+    log, _ = renamed
+    assert [(entry['id'], entry['op']) for entry in log.history('patient', 'P1')] == [
+        ('P1', 'create'), ('P1', 'update'), ('P1', 'update'), ('P2', 'rename'),
+        ('P2', 'append'), ('P2', 'update'), ('P1', 'rename')]
+    # P2's own history stops where it was renamed away
+    assert [entry['op'] for entry in log.history('patient', 'P2')] == [
+        'create', 'update', 'update', 'rename', 'append', 'update']
+    assert log.history('patient', 'D1') == []
+
+
+def test_state_at_replays_to_any_moment(renamed):
+    log, times = renamed
+    assert log.state_at('patient', 'P1', times['created'] - 1) is None
+    assert log.state_at('patient', 'P1', times['created'])['name'] == 'Ann'
+    assert log.state_at('patient', 'P1', times['edited'])['name'] == 'Anne'
+    # While it was P2 there was no P1
+    assert log.state_at('patient', 'P1', times['renamed']) is None
+    assert log.state_at('patient', 'P2', times['renamed'])['id'] == 'P2'
+    assert log.state_at('patient', 'P2', times['appended'])['medical_history'] == [
+        {'date': '2024-01-01', 'diagnosis': 'flu'}]
+    assert log.state_at('patient', 'P2', times['renamed back']) is None
+    assert log.state_at('patient', 'P1', times['renamed back'])['id'] == 'P1'
+
+
+def test_changes_between_is_inclusive_and_filters(renamed):
+    log, times = renamed
+    window = log.changes_between(times['edited'], times['renamed'])
+    assert [(entry['k'], entry['op']) for entry in window] == [
+        ('patient', 'update'), ('doctor', 'create'), ('patient', 'update'), ('patient', 'rename')]
+    assert [entry['k'] for entry in log.changes_between(0, times['renamed'], kind='doctor')] == ['doctor']
+    assert log.changes_between(times['renamed back'] + 1, times['renamed back'] + 100) == []
+
+    # An entity window includes what it did under its earlier IDs
+    entries = log.changes_between(times['renamed'], times['appended'], kind='patient', entity_id='P1')
+    assert [(entry['id'], entry['op']) for entry in entries] == [
+        ('P1', 'update'), ('P2', 'rename'), ('P2', 'append')]
+
+    start, end = datetime.fromtimestamp(times['edited']), datetime.fromtimestamp(times['edited'])
+    assert len(log.changes_between(start, end)) == 2
@@ -0,0 +1,98 @@
+# tests/test_dedupe.py
+import itertools
+import string
+from types import SimpleNamespace
+
+import pytest
+
+from shared import dedupe
+from shared.dedupe import find_duplicates, merge_patients, normalize_phone, soundex
+from shared.models import PatientList
+
+
+def person(patient_id, name, contact, age=40, gender='Female'):
+    return SimpleNamespace(id=patient_id, name=name, contact=contact, age=age, gender=gender)
+
+
+def pairs(candidates):
+    return [(c.first_id, c.second_id) for c in candidates]
+
+
+def test_phone_and_name_keys():
+    assert normalize_phone('+20 101 234 5678') == normalize_phone('01012345678') == \
+        normalize_phone('1012345678') == '012345678'
+    assert normalize_phone('12345') == ''
+    assert [soundex(word) for word in ('robert', 'rupert', 'ashcraft', 'pfister')] == \
+        ['R163', 'R163', 'A261', 'P236']
+
+
+def test_same_phone_in_another_format_is_found_once():
+    candidates = find_duplicates([person('P2', 'Ann Lee', '010 1234 5678'),
+                                  person('P1', 'Ann Lee', '+201012345678'),
+                                  person('P3', 'Bob Stone', '+201099999999')])
+    # The pair shares both the phone block and the name block
+    assert pairs(candidates) == [('P1', 'P2')]
+    assert candidates[0].score == 1.0
+    assert 'same phone' in candidates[0].reasons
+
+
+def test_one_digit_phone_typo_is_found_through_the_name_block():
+    candidates = find_duplicates([person('P1', 'Ahmed Hassan', '+201012345678', age=30),
+                                  person('P2', 'Ahmad Hassan', '+201012345679', age=31)])
+    assert pairs(candidates) == [('P1', 'P2')]
+    assert 'phone differs by one digit' in candidates[0].reasons
+    assert 'age within a year' in candidates[0].reasons
+
+
+def test_name_only_matches_need_a_low_threshold():
+    patients = [person('P1', 'Mohamed Ali', '+201011111111'),
+                person('P2', 'Mohammed Ali', '+201022222222'),
+                person('P3', 'Mohamed Ali', '+201033333333', age=70)]  # another age band
+    assert find_duplicates(patients) == []
+    assert pairs(find_duplicates(patients, threshold=0.7)) == [('P1', 'P2')]
+
+
+def test_a_huge_shared_phone_block_only_compares_name_neighbours(monkeypatch):
+    names = [' '.join(letters) for letters in itertools.islice(
+        itertools.product(['Ann', 'Bob', 'Cy', 'Dee'], string.ascii_uppercase, ['Lee', 'Roe', 'Oz']),
+        dedupe.MAX_BLOCK_SIZE + 50)]
+    patients = [person(f'P{n:03d}', name, '0000000000', age=20 + 7 * n) for n, name in enumerate(names)]
+    patients.append(person('DUP', names[100], '0000000000', age=patients[100].age))
+
+    scored = []
+    real_score = dedupe._score
+    monkeypatch.setattr(dedupe, '_score', lambda a, b, t: scored.append(1) or real_score(a, b, t))
+    candidates = find_duplicates(patients)
+    assert ('DUP', 'P100') in pairs(candidates)
+    assert len(scored) <= len(patients) * dedupe.WINDOW_SIZE
+
+
+@pytest.fixture
+def patient_list(data_dir):
+    patients = PatientList()
+    record = {'date': '2024-01-01', 'diagnosis': 'flu', 'prescription': 'rest'}
+    patients.add_patient({'id': 'P1', 'name': 'Ann Lee', 'age': 40, 'gender': 'Female',
+                          'contact': '+201012345678', 'medical_history': [record], 'notes': 'allergic'})
+    patients.add_patient({'id': 'P2', 'name': 'Ann Lee', 'age': 40, 'gender': 'Female',
+                          'contact': '+201012345678', 'emergency_contact': '+201099999999',
+                          'medical_history': [record, dict(record, date='2024-02-01')],
+                          'notes': 'prefers mornings'})
+    return patients
+
+
+def test_merge_fills_gaps_and_removes_the_duplicate(patient_list):
+    assert merge_patients(patient_list, 'P1', 'P2', actor='admin')
+
+    kept = patient_list.find_patient('P1')
+    assert patient_list.find_patient('P2') is None
+    assert kept.emergency_contact == '+201099999999'
+    assert [record['date'] for record in kept.medical_history] == ['2024-01-01', '2024-02-01']
+    assert kept.notes == 'allergic\nprefers mornings'
+    assert [entry['op'] for entry in patient_list.audit.history('patient', 'P2')][-1] == 'remove'
+    assert patient_list.audit.history('patient', 'P1')[-1]['by'] == 'admin'
+
+
+def test_merge_refuses_missing_or_identical_ids(patient_list):
+    assert not merge_patients(patient_list, 'P1', 'P1')
+    assert not merge_patients(patient_list, 'P1', 'P9')
+    assert patient_list.find_patient('P1') is not None
@@ -0,0 +1,72 @@
+# tests/test_schedule.py
+from datetime import time
+from types import SimpleNamespace
+
+import pytest
+
+from shared.schedule import WEEKDAYS, ScheduleIndex
+
+
+def doctor(doctor_id, schedule, start=None, end=None, specialization='GP'):
+    hours = {'start': start, 'end': end} if start else None
+    return SimpleNamespace(id=doctor_id, schedule=schedule, working_hours=hours,
+                           specialization=specialization)
+
+
+def on_duty(index, day, at, specialization=None):
+    return [d.id for d in index.available(day, at, specialization)]
+
+
+@pytest.fixture
+def index():
+    return ScheduleIndex([
+        doctor('night', ['Friday'], '22:00', '06:00'),
+        doctor('weekend', ['Sunday'], '20:30', '08:15', specialization='ER'),
+        doctor('day', ['Friday', 'Saturday'], '09:15', '17:45'),
+        doctor('default', ['Monday']),
+    ])
+
+
+def test_an_overnight_shift_runs_into_the_next_morning(index):
+    assert on_duty(index, 'Friday', '21:59') == []
+    assert on_duty(index, 'Friday', '22:00') == ['night']
+    assert on_duty(index, 'Saturday', '02:00') == ['night']
+    assert on_duty(index, 'Saturday', '05:59') == ['night']
+    assert on_duty(index, 'Saturday', '06:00') == []
+    # Only the Friday shift exists: no Thursday night, no Friday early morning
+    assert on_duty(index, 'Friday', '02:00') == []
+
+
+def test_a_sunday_night_shift_wraps_into_monday(index):
+    assert on_duty(index, 'Sunday', '23:00', 'ER') == ['weekend']
+    assert on_duty(index, 'Monday', '08:14') == ['weekend']
+    assert on_duty(index, 'Monday', '08:15') == []
+    assert on_duty(index, 'Sunday', '03:00') == []
+
+
+def test_shift_edges_are_checked_to_the_minute(index):
+    assert on_duty(index, 'Saturday', time(9, 14)) == []
+    assert on_duty(index, 'Saturday', time(9, 15)) == ['day']
+    assert on_duty(index, 'Saturday', '17:44') == ['day']
+    assert on_duty(index, 'Saturday', '17:45') == []
+    assert on_duty(index, 'Monday', '16:59') == ['default']
+    assert on_duty(index, 'Monday', '17:00') == []
+    assert on_duty(index, 'Friday', '22:30', 'GP') == ['night']
+    assert on_duty(index, 'Friday', '22:30', 'ER') == []
+
+
+def test_every_five_minutes_of_the_week_agree_with_a_direct_check(index):
+    # (doctor, weekday the shift starts, start minute, end minute)
+    shifts = [('night', 4, 22 * 60, 6 * 60), ('weekend', 6, 20 * 60 + 30, 8 * 60 + 15),
+              ('day', 4, 9 * 60 + 15, 17 * 60 + 45), ('day', 5, 9 * 60 + 15, 17 * 60 + 45),
+              ('default', 0, 9 * 60, 17 * 60)]
+
+    def works(day, minute, first_day, start, end):
+        since = ((day - first_day) % 7) * 24 * 60 + minute - start
+        return 0 <= since < (end - start) % (24 * 60)
+
+    for day in range(7):
+        for minute in range(0, 24 * 60, 5):
+            expected = sorted({name for name, *shift in shifts if works(day, minute, *shift)})
+            at = f'{minute // 60:02d}:{minute % 60:02d}'
+            assert sorted(on_duty(index, WEEKDAYS[day], at)) == expected, (WEEKDAYS[day], at)
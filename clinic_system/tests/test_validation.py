@@ -0,0 +1,50 @@
+# tests/test_validation.py
+from shared.validation import (normalize_id, normalize_name, normalize_phone, validate_batch,
+                               validate_patient)
+
+CLEAN = {'id': 'P1', 'name': 'Ann Lee', 'age': 40, 'gender': 'Female', 'contact': '+201012345678',
+         'medical_history': [{'date': '2024-01-01', 'diagnosis': 'flu', 'prescription': 'rest'}],
+         'notes': ''}
+
+
+def test_normalizers_hand_back_values_that_are_already_normal():
+    for normalize, value in ((normalize_id, 'P1'), (normalize_id, 'p-1.x'),
+                             (normalize_name, "Ann O'Lee"), (normalize_phone, '+201012345678')):
+        assert normalize(value) is value
+    assert normalize_id(' P1 ') == 'P1'
+    assert normalize_name('Ann  Lee ') == 'Ann Lee'
+    assert normalize_name('Ann ') == 'Ann'
+    assert normalize_phone('010 1234 5678') == '+201012345678'
+    assert normalize_phone('+0101234567') is None
+    assert normalize_phone('+２01012345678') is None  # not ASCII digits
+
+
+def test_a_clean_patient_comes_back_uncopied():
+    patient, errors = validate_patient(CLEAN)
+    assert errors == {}
+    assert patient is CLEAN
+
+
+def test_a_patient_is_copied_only_when_something_changes():
+    dirty = dict(CLEAN, name='Ann  Lee', medical_history=[
+        CLEAN['medical_history'][0], {'date': '2024-02-01 10:00', 'diagnosis': ' cold ', 'prescription': ''}])
+    patient, errors = validate_patient(dirty)
+    assert errors == {}
+    assert patient is not dirty and dirty['name'] == 'Ann  Lee'
+    assert patient['name'] == 'Ann Lee'
+    assert patient['medical_history'][0] is CLEAN['medical_history'][0]
+    assert patient['medical_history'][1] == {'date': '2024-02-01', 'diagnosis': 'cold', 'prescription': ''}
+
+
+def test_batch_checks_history_and_unknown_keys_on_clean_rows():
+    rows = [CLEAN,
+            dict(CLEAN, id='P2', medical_history=[{'date': 'soon', 'diagnosis': 'flu'}]),
+            dict(CLEAN, id='P3', version=1),
+            dict(CLEAN, id='P4', age=True)]
+    report = validate_batch(rows)
+    assert report.valid == [CLEAN]
+    assert report.errors == {
+        1: {'medical_history[0].date': 'must be a date as YYYY-MM-DD'},
+        2: {'version': 'is not a known field'},
+        3: {'age': 'must be a whole number from 0 to 150'},
+    }